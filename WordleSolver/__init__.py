@@ -7,9 +7,16 @@ Framework for creating wordle alike games and solvers.
 Modules in this package:
     - __init__.py           - this file
     - data_types.py         - module containing required data types for utils
+    - defaults.py           - module containing the default arguments of the game, the players and utils, built on first use.
+    - data/                 - the official Wordle dictionaries, one word per line, loaded by dictionary.py.
     - dictionary.py         - module containing all the official Wordle dictionaries in use. SPOILER ALERT! It contains all future solutions to the official game IN ORDER. "Viewer discretion advised."
+    - encoding.py           - module containing integer encodings of words used by the hot loops of the solver.
     - evaluate_player.py    - module used to evaluate user-defined subclass of WordleSolver.player.Player used to play the game.
+    - feedback.py           - module containing the feedback of a guess encoded as a base-3 int, for single and batched solutions.
+    - index.py              - module containing precomputed per-word indexes used to turn word filtering into bitmask tests.
     - players.py            - module containging Player classes used to play Wordle
+    - reporters.py          - module containing the reporters of the progress of evaluate_player (silent, progress bar, JSON lines, verbose).
+    - storage.py            - module containing a versioned binary file format for Wordlists, loaded through mmap.
     - utils.py              - module containing very useful functions used to solve the Wordle game.
     - wordle.py             - python implementation of the Wordle game.
 """
@@ -1,43 +1,100 @@
+import bisect
+import copy
+from array import array
+
+from . import encoding
+
+
 class Wordlist(list):
     """Sorted list with unique, equal-length strings"""
+    _MERGE_THRESHOLD = 16
+
     def __init__(self, dictionary: list = [], letters_per_word: int = 5):
         self.letters_per_word = letters_per_word
-        self.wordset = set()
 
-        if dictionary == []: return
-        self.extend(dictionary)
+        # Validate, dedupe and sort in a single pass instead of appending word by word
+        if isinstance(dictionary, Wordlist) and dictionary.letters_per_word == letters_per_word:
+            self.wordset = set(dictionary.wordset)
+            super().extend(dictionary)
+            return
+
+        self.wordset = {word for word in dictionary if type(word) == str and len(word) == letters_per_word and word.isalpha()}
+        super().extend(sorted(self.wordset))
+
+    @classmethod
+    def from_sorted(cls, dictionary, letters_per_word: int = 5) -> "Wordlist":
+        """Returns a Wordlist built from words already known to be valid, sorted and unique. The input is trusted and not checked."""
+        wordlist = cls.__new__(cls)
+        wordlist.letters_per_word = letters_per_word
+        list.extend(wordlist, dictionary)
+        wordlist.wordset = set(wordlist)
+        return wordlist
+
+    @property
+    def encoded(self) -> memoryview:
+        """Read-only view of the letter indices of every word (letters_per_word bytes per word, a = 0). Check encoding.py."""
+        if self.__dict__.get("_encoded") is None:
+            self._encoded = memoryview(encoding.encode_wordlist(self, self.letters_per_word)).toreadonly()
+        return self._encoded
+
+    @property
+    def packed(self) -> memoryview:
+        """Read-only view of every word packed into a 64-bit int, 5 bits per letter. Check encoding.py."""
+        if self.__dict__.get("_packed") is None:
+            self._packed = memoryview(encoding.pack_wordlist(self, self.letters_per_word)).toreadonly()
+        return self._packed
+
+    def find(self, word: str) -> int:
+        """Returns the index of a word or -1 if not found, in O(1) through a hash index built on first use."""
+        if word not in self.wordset: return -1
+        if self.__dict__.get("_lookup") is None:
+            self._lookup = {word: i for i, word in enumerate(self)}
+        return self._lookup.get(word, -1)
+
+    def _invalidate(self) -> None:
+        """Drops every cached structure derived from the order or contents of the list."""
+        self._encoded = None
+        self._packed = None
+        self._index = None
+        self._lookup = None
+
+    def __reduce__(self) -> tuple:
+        # Rebuilt from its words by from_sorted, the wordset and the cached structures (some of them views of mapped files) aren't copied or pickled
+        state = {key: value for key, value in self.__dict__.items() if key not in ("wordset", "_encoded", "_packed", "_index", "_lookup")}
+        return type(self).from_sorted, (list(self), self.letters_per_word), state
+
+    def __deepcopy__(self, memo: dict) -> "Wordlist":
+        # The words are immutable, only the list and the rest of the state have to be copied
+        copied = type(self).from_sorted(self, self.letters_per_word)
+        memo[id(self)] = copied
+        copied.__dict__.update(copy.deepcopy(self.__reduce__()[2], memo))
+        return copied
 
 
     def append(self, __object: str) -> None:
         if type(__object) != str or len(__object) != self.letters_per_word or not __object.isalpha() or __object in self.wordset: return
         
-        self.__insert(self.__find_index_to_insert(__object), __object)
+        self.__insert(bisect.bisect_left(self, __object), __object)
         self.wordset.add(__object)
+        self._invalidate()
 
     def extend(self, __iterable) -> None:
-        for word in __iterable:
-            self.append(word)
+        new_words = {word for word in __iterable if type(word) == str and len(word) == self.letters_per_word and word.isalpha()}.difference(self.wordset)
+        if len(new_words) == 0: return
+
+        # A handful of words is cheaper to bisect in, larger batches are merged with a single sort of two sorted runs
+        if len(new_words) <= Wordlist._MERGE_THRESHOLD:
+            for word in sorted(new_words):
+                self.__insert(bisect.bisect_left(self, word), word)
+        else:
+            super().extend(sorted(new_words))
+            super().sort()
+        self.wordset.update(new_words)
+        self._invalidate()
 
     def __insert(self, __index: int, __object: str) -> None:
         return super().insert(__index, __object)
 
-    def __find_index_to_insert(self, word: str) -> int:
-        if self.__len__() == 0: return 0
-
-        upper_bound = self.__len__()-1
-        lower_bound = 0
-
-        # Check if the value should be inserted at any end
-        if word < self[lower_bound]: return 0
-        if word > self[upper_bound]: return upper_bound+1
-
-        while True:
-            i = len(self[lower_bound:upper_bound]) // 2
-            # print(word, self, self[lower_bound+i], self[lower_bound+i+1], lower_bound, i, upper_bound)
-            if self[lower_bound+i] < word < self[lower_bound+i+1]: return lower_bound+i+1
-            if self[lower_bound+i] >= word: upper_bound = lower_bound + i
-            else: lower_bound = lower_bound + i
-
 
     def __disable_attribute() -> None:
         raise Exception("Operation not permitted")
@@ -45,13 +102,191 @@ class Wordlist(list):
     def insert(self, __index, __object): Wordlist.__disable_attribute()
     def reverse(self): Wordlist.__disable_attribute()
 
+    # Remaining list mutators keep their behaviour but keep the wordset in sync and drop the cached encodings
+    def __setitem__(self, __index, __object): super().__setitem__(__index, __object); self.wordset = set(self); self._invalidate()
+    def __delitem__(self, __index): super().__delitem__(__index); self.wordset = set(self); self._invalidate()
+    def __iadd__(self, __iterable): self.extend(__iterable); return self
+    def remove(self, __object): super().remove(__object); self.wordset.discard(__object); self._invalidate()
+    def clear(self): super().clear(); self.wordset.clear(); self._invalidate()
+    def sort(self, *, key=None, reverse=False): super().sort(key=key, reverse=reverse); self._invalidate()
+
+    def pop(self, __index=-1):
+        word = super().pop(__index)
+        self.wordset.discard(word)
+        self._invalidate()
+        return word
+
+
+
+class WordlistView:
+    """Subset of a Wordlist that references the words of the parent by their index instead of copying them.
+    The view has its own order (parent order unless sorted) and assumes the parent isn't mutated while the view is in use."""
+    __slots__ = ("parent", "indices", "letters_per_word", "_bits", "_lookup", "_ascending")
+
+    def __init__(self, parent: Wordlist, indices=None) -> None:
+        self.parent = parent
+        self.letters_per_word = parent.letters_per_word
+        self.indices = array("L", range(len(parent)) if indices is None else indices)
+        self._bits = None
+        self._lookup = None
+        self._ascending = indices is None
+
+    @classmethod
+    def from_bits(cls, parent: Wordlist, bits: int) -> "WordlistView":
+        """Returns the view of the words of parent whose bit is set in bits, in parent order."""
+        view = cls(parent, encoding.bitset_indices(bits))
+        view._bits = bits
+        view._ascending = True
+        return view
+
+    @property
+    def bits(self) -> int:
+        """Bitset of the parent indices of the words in the view. Check encoding.bitset_indices."""
+        if self._bits is None:
+            self._bits = encoding.indices_bitset(self.indices)
+        return self._bits
+
+    @property
+    def encoded(self) -> bytes:
+        """Letter indices of every word of the view, in view order. Check Wordlist.encoded."""
+        codes = self.parent.encoded
+        return b"".join([codes[i*self.letters_per_word:(i+1)*self.letters_per_word] for i in self.indices])
+
+    def narrow(self, bits: int) -> "WordlistView":
+        """Returns a new view with the words of this view whose parent index is set in bits, keeping the order of this view."""
+        if self._ascending:
+            return WordlistView.from_bits(self.parent, self.bits & bits)
+        return WordlistView(self.parent, [i for i in self.indices if bits >> i & 1])
 
+    def sort(self, *, key=None, reverse: bool = False) -> None:
+        """Sorts the view in place (stable), key is called with the words."""
+        words = self.parent
+        if key is None:
+            ordered = sorted(self.indices, key=words.__getitem__, reverse=reverse)
+        else:
+            ordered = sorted(self.indices, key=lambda i: key(words[i]), reverse=reverse)
+        self.indices = array("L", ordered)
+        self._lookup = None
+        self._ascending = False
+
+    def find(self, word: str) -> int:
+        """Returns the index of a word in the view or -1 if not found."""
+        parent_index = self.parent.find(word)
+        if parent_index == -1 or not self.bits >> parent_index & 1: return -1
+        if self._lookup is None:
+            self._lookup = {j: i for i, j in enumerate(self.indices)}
+        return self._lookup[parent_index]
+
+    def to_wordlist(self) -> Wordlist:
+        """Returns the words of the view as a new (sorted) Wordlist."""
+        return Wordlist(list(self), self.letters_per_word)
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __iter__(self):
+        return map(self.parent.__getitem__, self.indices)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice): return WordlistView(self.parent, self.indices[i])
+        return self.parent[self.indices[i]]
+
+    def __contains__(self, word) -> bool:
+        i = self.parent.find(word) if type(word) == str else -1
+        return i != -1 and bool(self.bits >> i & 1)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (WordlistView, list)): return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return "WordlistView(" + repr(list(self)) + ")"
+
+
+
+class ScoringRubric:
+    """Scoring rubric stored as a 26 x (letters_per_word + 1) matrix of floats, letter by letter. Check format.txt for details.
+    rubric[letter][i] is still available and reads and writes the matrix in place."""
+    __slots__ = ("letters_per_word", "matrix")
 
-class ScoringRubric(dict):
-    """Special dict that follows scoring rubric format. Check format.txt for details."""
     def __init__(self, letters_per_word: int = 5) -> None:
         self.letters_per_word = letters_per_word
-        self.update({chr(k): [0 for i in range(letters_per_word + 1)] for k in range(97, 123)})
+        self.matrix = array("d", bytes(array("d").itemsize * encoding.ALPHABET_SIZE * (letters_per_word + 1)))
+
+    def row(self, code: int) -> memoryview:
+        """Returns a writable view of the row of the letter with index code (a = 0)."""
+        return memoryview(self.matrix)[code * (self.letters_per_word + 1):(code + 1) * (self.letters_per_word + 1)]
+
+    def column(self, i: int) -> array:
+        """Returns a copy of the i-th entry of every letter (0 - general score, 1 to letters_per_word - weights at each position)."""
+        return self.matrix[i::self.letters_per_word + 1]
+
+    def __code(self, letter) -> int:
+        if type(letter) != str or len(letter) != 1 or not "a" <= letter <= "z": raise KeyError(letter)
+        return ord(letter) - 97
+
+    def __getitem__(self, letter: str) -> "_RubricRow":
+        return _RubricRow(self.matrix, self.__code(letter) * (self.letters_per_word + 1), self.letters_per_word + 1)
+
+    def __setitem__(self, letter: str, values) -> None:
+        values = [float(value) for value in values]
+        if len(values) != self.letters_per_word + 1: raise ValueError("Expected " + str(self.letters_per_word + 1) + " values")
+        offset = self.__code(letter) * (self.letters_per_word + 1)
+        self.matrix[offset:offset + self.letters_per_word + 1] = array("d", values)
+
+    def __contains__(self, letter) -> bool:
+        return type(letter) == str and len(letter) == 1 and "a" <= letter <= "z"
+
+    def __iter__(self):
+        return iter(encoding.ALPHABET)
+
+    def __len__(self) -> int:
+        return encoding.ALPHABET_SIZE
+
+    def keys(self): return list(encoding.ALPHABET)
+    def values(self): return [self[letter] for letter in encoding.ALPHABET]
+    def items(self): return [(letter, self[letter]) for letter in encoding.ALPHABET]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ScoringRubric): return self.letters_per_word == other.letters_per_word and self.matrix == other.matrix
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr({letter: list(self[letter]) for letter in encoding.ALPHABET})
+
+
+class _RubricRow:
+    """List-like, writable view of a single letter of a ScoringRubric."""
+    __slots__ = ("_matrix", "_offset", "_length")
+
+    def __init__(self, matrix: array, offset: int, length: int) -> None:
+        self._matrix = matrix
+        self._offset = offset
+        self._length = length
+
+    def __index(self, i: int) -> int:
+        if i < 0: i += self._length
+        if not 0 <= i < self._length: raise IndexError("rubric index out of range")
+        return self._offset + i
+
+    def __getitem__(self, i):
+        if isinstance(i, slice): return self._matrix[self._offset:self._offset + self._length].tolist()[i]
+        return self._matrix[self.__index(i)]
+
+    def __setitem__(self, i: int, value: float) -> None:
+        self._matrix[self.__index(i)] = value
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self):
+        return iter(self._matrix[self._offset:self._offset + self._length])
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
 
 
 
@@ -62,4 +297,213 @@ class Positions(dict):
         self.update({
         **{chr(k): [0, letters_per_word, set(range(1, letters_per_word + 1)), set()] for k in range(97, 123)},
         **{i: [set("abcdefghijklmnopqrstuvwxyz"), set()] for i in range(1, letters_per_word + 1)},
-    })
\ No newline at end of file
+    })
+
+
+
+class CompactPositions:
+    """Positions (check format.txt) stored in a fixed-size array of ints, with sets of positions and letters stored as bitmasks.
+    Position p is bit p-1 and letter code c (a = 0) is bit c. Cheap to copy, undo and hash, for exploring hypothetical feedback."""
+    __slots__ = ("letters_per_word", "state", "_history")
+
+    # Per letter: [min_num_of_occurances, max_num_of_occurances, allowed positions, blocked positions], then per position: [possible letters, required letters]
+    MIN, MAX, ALLOWED, BLOCKED = range(4)
+    POSSIBLE, REQUIRED = range(2)
+
+    def __init__(self, letters_per_word: int = 5) -> None:
+        self.letters_per_word = letters_per_word
+        all_positions = (1 << letters_per_word) - 1
+        all_letters = (1 << encoding.ALPHABET_SIZE) - 1
+        self.state = array("l", [0, letters_per_word, all_positions, 0] * encoding.ALPHABET_SIZE + [all_letters, 0] * letters_per_word)
+        self._history = []
+
+    def letter(self, code: int) -> array:
+        """Returns a copy of [min, max, allowed positions mask, blocked positions mask] of the letter code."""
+        return self.state[code * 4:code * 4 + 4]
+
+    def position(self, position: int) -> array:
+        """Returns a copy of [possible letters mask, required letters mask] of a position (from 1 to letters_per_word)."""
+        offset = self.__position_offset(position)
+        return self.state[offset:offset + 2]
+
+    def checked_letters(self) -> int:
+        """Returns the mask of the letters that have appeared in previous queries. Check utils.letter_checked."""
+        checked = 0
+        default = array("l", [0, self.letters_per_word, (1 << self.letters_per_word) - 1, 0])
+        for code in range(encoding.ALPHABET_SIZE):
+            if self.state[code * 4:code * 4 + 4] != default:
+                checked |= 1 << code
+        return checked
+
+    def apply(self, round_state: dict) -> None:
+        """Updates the positions with the result of a round (check format.txt), same as players.ComputerPlayer.check_letters."""
+        state = self.state
+        MIN, MAX, ALLOWED, BLOCKED = CompactPositions.MIN, CompactPositions.MAX, CompactPositions.ALLOWED, CompactPositions.BLOCKED
+
+        # Included (Yellow) letters
+        for letter in round_state["included"]:
+            row = (ord(letter) - 97) * 4
+            state[row + MIN] = max(state[row + MIN], len(round_state["included"][letter]) + len(round_state["correct"].get(letter, ())))
+            state[row + ALLOWED] &= ~_positions_mask(round_state["included"][letter])
+
+        # Correct (Green) letters
+        for letter in round_state["correct"]:
+            row = (ord(letter) - 97) * 4
+            state[row + MIN] = max(state[row + MIN], len(round_state["correct"][letter]) + len(round_state["included"].get(letter, ())))
+            state[row + BLOCKED] |= _positions_mask(round_state["correct"][letter])
+            for position in round_state["correct"][letter]:
+                state[self.__position_offset(position) + CompactPositions.REQUIRED] |= 1 << (ord(letter) - 97)
+
+        # Excluded (Gray) letters
+        for letter in round_state["excluded"]:
+            row = (ord(letter) - 97) * 4
+            if len(round_state["excluded"][letter]) > 0:
+                state[row + MAX] = state[row + MIN]
+            state[row + ALLOWED] &= ~_positions_mask(round_state["excluded"][letter])
+
+    def __position_offset(self, position: int) -> int:
+        return encoding.ALPHABET_SIZE * 4 + (position - 1) * 2
+
+    def copy(self) -> "CompactPositions":
+        """Returns an independent copy without the undo history."""
+        positions = CompactPositions.__new__(CompactPositions)
+        positions.letters_per_word = self.letters_per_word
+        positions.state = array("l", self.state)
+        positions._history = []
+        return positions
+
+    def push(self) -> None:
+        """Saves the current state, restored by the matching pop."""
+        self._history.append(array("l", self.state))
+
+    def pop(self) -> None:
+        """Restores the state saved by the last push."""
+        self.state = self._history.pop()
+
+    def key(self) -> bytes:
+        """Returns a hashable, canonical key of the current state."""
+        return self.state.tobytes()
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, CompactPositions): return self.letters_per_word == other.letters_per_word and self.state == other.state
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.key())
+
+    @classmethod
+    def from_positions(cls, positions: Positions) -> "CompactPositions":
+        """Returns the CompactPositions equivalent of a Positions dict."""
+        compact = cls(positions.letters_per_word)
+        for code in range(encoding.ALPHABET_SIZE):
+            minimum, maximum, allowed, blocked = positions[encoding.ALPHABET[code]]
+            compact.state[code*4:code*4 + 4] = array("l", [minimum, maximum, _positions_mask(allowed), _positions_mask(blocked)])
+        for position in range(1, positions.letters_per_word + 1):
+            offset = compact.__position_offset(position)
+            compact.state[offset:offset + 2] = array("l", [_letters_mask(positions[position][0]), _letters_mask(positions[position][1])])
+        return compact
+
+    def to_positions(self) -> Positions:
+        """Returns the Positions dict equivalent of this state."""
+        positions = Positions(self.letters_per_word)
+        for code in range(encoding.ALPHABET_SIZE):
+            minimum, maximum, allowed, blocked = self.letter(code)
+            positions[encoding.ALPHABET[code]] = [minimum, maximum, _positions_set(allowed), _positions_set(blocked)]
+        for position in range(1, self.letters_per_word + 1):
+            possible, required = self.position(position)
+            positions[position] = [_letters_set(possible), _letters_set(required)]
+        return positions
+
+
+
+class GameResult(dict):
+    """Result of a game played by wordle.play (and play_batch, play_adversarial).
+    The dict play used to return ({"solution": ..., "rounds": ..., "won": ..., "potential_solutions": ...}), with its keys also readable as attributes.
+    potential_solutions is only available if it is known (won games). illegal_guess is the guess that lost a hard mode game by ignoring the hints revealed so far,
+    it is only available in such games. trace is None unless the game was played with trace=True, then trace[i] is the RoundTrace of round i+1."""
+    __slots__ = ("trace",)
+
+    def __init__(self, solution: str, rounds: int, won: bool, potential_solutions: int = None, trace: list = None, illegal_guess: str = None) -> None:
+        super().__init__(solution=solution, rounds=rounds, won=won)
+        # Optional keys are left out while unknown, so results are equal to the dicts play used to return
+        if potential_solutions is not None: self["potential_solutions"] = potential_solutions
+        if illegal_guess is not None: self["illegal_guess"] = illegal_guess
+        self.trace = trace
+
+    @property
+    def solution(self) -> str:
+        return self["solution"]
+
+    @property
+    def rounds(self) -> int:
+        return self["rounds"]
+
+    @property
+    def won(self) -> bool:
+        return self["won"]
+
+    @property
+    def potential_solutions(self) -> int:
+        return self.get("potential_solutions")
+
+    @property
+    def illegal_guess(self) -> str:
+        return self.get("illegal_guess")
+
+    def to_dict(self) -> dict:
+        """Returns the result as a plain dict (without the trace)."""
+        return dict(self)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, GameResult): return dict.__eq__(self, other) and self.trace == other.trace
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other) -> bool:
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+
+class RoundTrace:
+    """Record of a single round of a traced game: the guess and description returned by the player, the feedback code of the guess,
+    the number of candidates reported by the player and the wall time (time.perf_counter, in seconds) spent in player.guess and in player.check_feedback.
+    feedback_seconds is None in the last round of a won game, in which the player gets no feedback."""
+    __slots__ = ("guess", "description", "code", "candidates", "guess_seconds", "feedback_seconds")
+
+    def __init__(self, guess: str, description: str, code: int, candidates: int, guess_seconds: float, feedback_seconds: float = None) -> None:
+        self.guess = guess
+        self.description = description
+        self.code = code
+        self.candidates = candidates
+        self.guess_seconds = guess_seconds
+        self.feedback_seconds = feedback_seconds
+
+    @property
+    def seconds(self) -> float:
+        """Wall time spent by the player in the round."""
+        return self.guess_seconds + (self.feedback_seconds or 0.0)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, RoundTrace): return all(getattr(self, name) == getattr(other, name) for name in RoundTrace.__slots__)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return "RoundTrace(" + ", ".join(name + "=" + repr(getattr(self, name)) for name in RoundTrace.__slots__) + ")"
+
+
+def _positions_mask(positions) -> int:
+    mask = 0
+    for position in positions:
+        mask |= 1 << (position - 1)
+    return mask
+
+def _positions_set(mask: int) -> set:
+    return {i + 1 for i in range(mask.bit_length()) if mask >> i & 1}
+
+def _letters_mask(letters) -> int:
+    mask = 0
+    for letter in letters:
+        mask |= 1 << (ord(letter) - 97)
+    return mask
+
+def _letters_set(mask: int) -> set:
+    return {encoding.ALPHABET[i] for i in range(encoding.ALPHABET_SIZE) if mask >> i & 1}
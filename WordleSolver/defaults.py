@@ -0,0 +1,33 @@
+"""
+defaults.py
+by Fufs
+
+Default arguments of the game, the players and utils. They are built on first use and shared by every caller, instead of being built when the modules are imported.
+
+This module contains:
+    - dictionary_wordlist   - Returns the list of all words accepted by the game (dictionary.wordlist).
+    - solution_list         - Returns the list of all solutions of the game (dictionary.solution_list).
+    - wordlist              - Returns the Wordlist of all words accepted by the game with letters_per_word letters.
+"""
+
+import functools
+
+from . import data_types
+
+
+def dictionary_wordlist() -> list:
+    """Returns the list of all words accepted by the game (dictionary.wordlist)."""
+    from . import dictionary
+    return dictionary.wordlist
+
+
+def solution_list() -> list:
+    """Returns the list of all solutions of the game (dictionary.solution_list)."""
+    from . import dictionary
+    return dictionary.solution_list
+
+
+@functools.lru_cache(maxsize=None)
+def wordlist(letters_per_word: int = 5) -> data_types.Wordlist:
+    """Returns the Wordlist of all words accepted by the game with letters_per_word letters. The same Wordlist is returned on every call, don't modify it."""
+    return data_types.Wordlist(dictionary_wordlist(), letters_per_word)
@@ -0,0 +1,96 @@
+"""
+encoding.py
+by Fufs
+
+Integer encodings of words used by the hot loops of the solver. A letter is encoded as its index in the alphabet (a = 0, ..., z = 25).
+
+This module contains:
+    - encode_word       - Returns the letter indices of a word as bytes.
+    - decode_word       - Returns the word described by a sequence of letter indices.
+    - pack_word         - Returns a word packed into a single int, 5 bits per letter, first letter in the lowest bits.
+    - unpack_word       - Returns the word packed into an int by pack_word.
+    - encode_wordlist   - Returns an array('B') with the letter indices of all the words, letters_per_word entries per word.
+    - pack_wordlist     - Returns an array('Q') with every word packed by pack_word.
+    - bitset_indices    - Returns the positions of the set bits of a bitset (python int) in ascending order.
+    - indices_bitset    - Returns the bitset (python int) with the bits at the given positions set.
+"""
+
+from array import array
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyz"
+ALPHABET_SIZE = 26
+BITS_PER_LETTER = 5
+MAX_PACKED_LETTERS = 64 // BITS_PER_LETTER
+
+_TO_CODES = bytes((i - 97) % 256 for i in range(256))
+_FROM_CODES = bytes((i + 97) % 256 for i in range(256))
+
+
+def encode_word(word: str) -> bytes:
+    """Returns the letter indices of a word as bytes."""
+    try:
+        codes = word.encode("ascii").translate(_TO_CODES)
+    except UnicodeEncodeError:
+        raise ValueError("Only words made of letters a-z can be encoded: " + repr(word)) from None
+    if len(codes) > 0 and max(codes) >= ALPHABET_SIZE: raise ValueError("Only words made of letters a-z can be encoded: " + repr(word))
+    return codes
+
+
+def decode_word(codes) -> str:
+    """Returns the word described by a sequence of letter indices."""
+    return bytes(codes).translate(_FROM_CODES).decode("ascii")
+
+
+def pack_word(word: str) -> int:
+    """Returns a word packed into a single int, 5 bits per letter, first letter in the lowest bits."""
+    packed = 0
+    for i, code in enumerate(encode_word(word)):
+        packed |= code << (BITS_PER_LETTER * i)
+    return packed
+
+
+def unpack_word(packed: int, letters_per_word: int = 5) -> str:
+    """Returns the word packed into an int by pack_word."""
+    return decode_word((packed >> (BITS_PER_LETTER * i)) & 0b11111 for i in range(letters_per_word))
+
+
+def encode_wordlist(wordlist, letters_per_word: int = 5) -> array:
+    """Returns an array('B') with the letter indices of all the words, letters_per_word entries per word."""
+    codes = array("B", encode_word("".join(wordlist)))
+    if len(codes) != len(wordlist) * letters_per_word: raise ValueError("letters_per_word mismatch")
+    return codes
+
+
+def pack_wordlist(wordlist, letters_per_word: int = 5) -> array:
+    """Returns an array('Q') with every word packed by pack_word."""
+    if letters_per_word > MAX_PACKED_LETTERS: raise ValueError("Words longer than " + str(MAX_PACKED_LETTERS) + " letters can't be packed into 64 bits")
+
+    codes = encode_wordlist(wordlist, letters_per_word)
+    packed = array("Q", bytes(8 * len(wordlist)))
+    for i in range(letters_per_word):
+        shift = BITS_PER_LETTER * i
+        column = codes[i::letters_per_word]
+        for j in range(len(packed)):
+            packed[j] |= column[j] << shift
+    return packed
+
+
+def bitset_indices(bits: int) -> list:
+    """Returns the positions of the set bits of a bitset (python int) in ascending order."""
+    digits = bin(bits)[:1:-1]
+    indices = []
+    i = digits.find("1")
+    while i != -1:
+        indices.append(i)
+        i = digits.find("1", i + 1)
+    return indices
+
+
+def indices_bitset(indices) -> int:
+    """Returns the bitset (python int) with the bits at the given positions set."""
+    indices = list(indices)
+    if len(indices) == 0: return 0
+    bits = bytearray(max(indices) // 8 + 1)
+    for i in indices:
+        bits[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bits, "little")
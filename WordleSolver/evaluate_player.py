@@ -5,10 +5,21 @@ by Fufs
 Evaluates the effectiveness of a sub-class of WordleSolver.player.Player
 
 This module contains:
-    - evaluate_player - function used to evaluate a sub-class of WordleSolver.player.Player
+    - evaluate_player   - function used to evaluate a sub-class of WordleSolver.player.Player
+    - load_log          - Returns the results of the games stored in a log of evaluate_player.
+    - metrics_from_log  - Returns the metrics of the games stored in a log of evaluate_player.
+
+A log is a JSON lines file with a line per finished game, appended as games finish: {"index": ..., "solution": ..., "rounds": ..., "won": ..., "potential_solutions": ...}
+(potential_solutions is missing from lost games, a hard mode game lost to an illegal guess also has "illegal_guess": ...)
 """
 
-from . import data_types, players, wordle
+import functools
+import json
+
+from . import data_types, index, players, reporters, wordle
+
+# Games played by a worker per task with workers, small enough to balance the load and to stop soon after a KeyboardInterrupt
+GAMES_PER_SHARD = 8
 
 
 def evaluate_player(
@@ -18,43 +29,221 @@ def evaluate_player(
     player_kwargs: dict,
     rounds_per_game: int = 6,
     extended: bool = True,
+    batch_size: int = None,
+    hard_mode: bool = False,
+    workers: int = None,
+    reporter: reporters.Reporter = None,
+    latency: bool = False,
+    log: str = None,
+    resume: bool = False,
 ) -> dict:
     """
     Tests an instance of a subclass of player.Player with every word in solution_list.
+    With batch_size, up to batch_size games are played in lockstep by wordle.play_batch instead of one at a time.
+    In hard mode the players are created with hard_mode=True and every guess has to be consistent with the hints revealed so far.
+    A guess that isn't loses its game, the number of such games is reported as illegal_guesses.
+    With workers, the solutions are split into shards played by a pool of workers processes. The metrics are the same as those of a run in a single process.
+    Progress is reported to reporter (a reporters.VerboseReporter by default, reporters.Reporter() to stay silent). Check reporters.py.
+    With latency, every game is traced and the metrics include the latency percentiles of player.guess and player.check_feedback. Check _latency.
+    With log, the result of every game is appended to the log file as soon as it finishes, the log of an earlier run is overwritten unless resume.
+    With resume, the games already in the log (same index and solution) aren't played again and count towards the metrics, so an evaluation can be run in chunks.
+    The reporter only sees the games played by this run.
+    On KeyboardInterrupt the metrics of the games finished so far are returned.
     """
-    total_rounds = 0
-    points = 0
-    wins = 0
-    certainty = 0
+    if reporter is None: reporter = reporters.VerboseReporter()
+    if hard_mode: player_kwargs = dict(player_kwargs, hard_mode=True)
+
+    results = load_log(log, solution_list) if resume and log is not None else {}
+    games = [(index, solution) for index, solution in enumerate(solution_list) if index not in results]
+    resumed = len(results)
+    log_file = _open_log(log, resume) if log is not None else None
+    # Games are only traced and events only emitted for the events the reporter subscribes to
+    on_round = reporter.round if reporters.subscribed(reporter, "round") else None
+    on_game = reporter.game if reporters.subscribed(reporter, "game") else None
+    trace = on_round is not None or latency
+
+    def collect(index: int, round_score: data_types.GameResult) -> None:
+        results[index] = round_score
+        if log_file is not None:
+            log_file.write(json.dumps({"index": index, **round_score.to_dict()}) + "\n")
+            log_file.flush()
+        if on_round is not None:
+            for round_trace in round_score.trace:
+                on_round(index, round_trace)
+        if on_game is not None: on_game(index, round_score, len(results) - resumed, len(games))
 
+    if reporters.subscribed(reporter, "start"): reporter.start(len(games))
     try:
-        for solution in solution_list:
-            print("Testing", solution, "(" + str(total_rounds + 1) + "/" + str(len(solution_list)) + ")",)
-            round_score = wordle.play(
-                wordlist,
-                solution=solution,
-                player=player_class(**player_kwargs),
-                rounds_per_game=rounds_per_game,
-                extended=extended,
-                dev=True,
-            )
-            points += round_score["rounds"]
-            if round_score["won"]: wins += 1
-            certainty += 100 / round_score["potential_solutions"]
-
-            print(round_score)
-            print()
-            
-            total_rounds += 1
+        if workers is not None:
+            _evaluate_in_pool(collect, wordlist, games, player_class, player_kwargs, rounds_per_game, extended, batch_size, hard_mode, trace, workers)
+        elif batch_size is None:
+            for index, solution in games:
+                collect(index, wordle.play(
+                    wordlist,
+                    solution=solution,
+                    player=player_class(**player_kwargs),
+                    rounds_per_game=rounds_per_game,
+                    extended=extended,
+                    hard_mode=hard_mode,
+                    trace=trace,
+                ))
+        else:
+            player_factory = functools.partial(player_class, **player_kwargs)
+            for i, round_score in wordle.play_batch(wordlist, [solution for _, solution in games], player_factory, rounds_per_game, extended, batch_size, hard_mode, trace):
+                collect(games[i][0], round_score)
 
     except KeyboardInterrupt:
         pass
+    finally:
+        if log_file is not None: log_file.close()
+
+    metrics = _aggregate(results)
+    if latency: metrics["latency"] = _latency(results)
+    if reporters.subscribed(reporter, "finish"): reporter.finish(metrics)
+    return metrics
+
+
+def _evaluate_in_pool(collect, wordlist: data_types.Wordlist, games: list, player_class: players.Player, player_kwargs: dict, rounds_per_game: int, extended: bool, batch_size: int, hard_mode: bool, trace: bool, workers: int) -> None:
+    """Plays the games (index, solution) of evaluate_player in a pool of workers processes, passing every result to collect(index, result) as shards finish. Stops early on KeyboardInterrupt."""
+    # Batched games need shards of at least batch_size games to fill a batch
+    shard_size = GAMES_PER_SHARD if batch_size is None else max(GAMES_PER_SHARD, batch_size)
+    shards = [games[start:start + shard_size] for start in range(0, len(games), shard_size)]
+    arguments = (list(wordlist), wordlist.letters_per_word, player_class, player_kwargs, rounds_per_game, extended, batch_size, hard_mode, trace)
+
+    # Imported here so that evaluations in a single process don't pay for it
+    import concurrent.futures
+    executor = concurrent.futures.ProcessPoolExecutor(workers, initializer=_start_worker, initargs=arguments)
+    futures = [executor.submit(_play_shard, shard) for shard in shards]
+    collected = set()
+    try:
+        for future in concurrent.futures.as_completed(futures):
+            collected.add(future)
+            for index, round_score in future.result().items():
+                collect(index, round_score)
+    except KeyboardInterrupt:
+        # Workers return the games of their shard they finished before the interrupt
+        executor.shutdown(wait=True, cancel_futures=True)
+        for future in futures:
+            if future not in collected and future.done() and not future.cancelled() and future.exception() is None:
+                for index, round_score in future.result().items():
+                    collect(index, round_score)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _start_worker(words: list, letters_per_word: int, player_class: players.Player, player_kwargs: dict, rounds_per_game: int, extended: bool, batch_size: int, hard_mode: bool, trace: bool) -> None:
+    global _worker
+    wordlist = data_types.Wordlist.from_sorted(words, letters_per_word)
+    # Warm the shared index and whatever a player builds on creation once per worker instead of in the first game
+    word_index = index.get_index(wordlist)
+    word_index.position_bits, word_index.count_bits
+    player_class(**player_kwargs)
+    _worker = (wordlist, player_class, player_kwargs, rounds_per_game, extended, batch_size, hard_mode, trace)
+
+def _play_shard(shard: list) -> dict:
+    wordlist, player_class, player_kwargs, rounds_per_game, extended, batch_size, hard_mode, trace = _worker
+    results = {}
+    try:
+        if batch_size is None:
+            for index, solution in shard:
+                results[index] = wordle.play(wordlist, solution, player_class(**player_kwargs), rounds_per_game, extended, hard_mode=hard_mode, trace=trace)
+        else:
+            solutions = [solution for _, solution in shard]
+            for i, round_score in wordle.play_batch(wordlist, solutions, functools.partial(player_class, **player_kwargs), rounds_per_game, extended, batch_size, hard_mode, trace):
+                results[shard[i][0]] = round_score
+    except KeyboardInterrupt:
+        pass
+    return results
 
-    return {
+
+def load_log(path: str, solution_list: list = None) -> dict:
+    """Returns the GameResults stored in a log of evaluate_player by index of their solution (none if the log doesn't exist).
+    With solution_list, only the games whose solution is solution_list[index] are returned. An incomplete last line (e.g. after a crash) is ignored."""
+    results = {}
+    try:
+        file = open(path)
+    except FileNotFoundError:
+        return results
+
+    with file:
+        for line in file:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            index = entry["index"]
+            if solution_list is not None and (index >= len(solution_list) or solution_list[index] != entry["solution"]): continue
+            results[index] = data_types.GameResult(entry["solution"], entry["rounds"], entry["won"], entry.get("potential_solutions"), illegal_guess=entry.get("illegal_guess"))
+    return results
+
+
+def _open_log(path: str, resume: bool):
+    """Opens a log for appending, emptied first unless resume. An incomplete last line is ended first so that it doesn't corrupt the next entry."""
+    if not resume: return open(path, "w")
+    with open(path, "ab+") as file:
+        if file.seek(0, 2) > 0:
+            file.seek(-1, 2)
+            if file.read(1) != b"\n": file.write(b"\n")
+    return open(path, "a")
+
+
+def metrics_from_log(path: str, solution_list: list = None) -> dict:
+    """Returns the metrics of the games stored in a log of evaluate_player, the same as those returned by the evaluation that wrote it."""
+    return _aggregate(load_log(path, solution_list))
+
+
+def _aggregate(results: dict) -> dict:
+    """Returns the metrics of the results of games by index of their solution, summed in the order of solution_list."""
+    total_rounds = 0
+    points = 0
+    wins = 0
+    certainty = 0
+    illegal_guesses = 0
+
+    for index in sorted(results):
+        points += results[index]["rounds"]
+        if results[index]["won"]: wins += 1
+        # Lost games never narrowed down their solution
+        if "potential_solutions" in results[index]: certainty += 100 / results[index]["potential_solutions"]
+        if "illegal_guess" in results[index]: illegal_guesses += 1
+        total_rounds += 1
+
+    metrics = {
         "avg_rounds": round(points / total_rounds, 2),
         "win_rate": round(wins / total_rounds * 100, 2),
         "certainty": round(certainty / total_rounds, 2),
     }
+    if illegal_guesses > 0: metrics["illegal_guesses"] = illegal_guesses
+    return metrics
+
+
+def _latency(results: dict) -> dict:
+    """Returns the latency of player.guess and player.check_feedback in the traced results in milliseconds:
+    {"guess": {"all": percentiles, 1: percentiles of round 1, ...}, "check_feedback": {...}}, percentiles being {"p50": ..., "p90": ..., "p99": ..., "max": ...}."""
+    samples = {"guess": {}, "check_feedback": {}}
+    for index in sorted(results):
+        # Games resumed from a log have no trace
+        if results[index].trace is None: continue
+        for round_number, round_trace in enumerate(results[index].trace, 1):
+            samples["guess"].setdefault(round_number, []).append(round_trace.guess_seconds)
+            if round_trace.feedback_seconds is not None:
+                samples["check_feedback"].setdefault(round_number, []).append(round_trace.feedback_seconds)
+
+    latency = {}
+    for call, rounds in samples.items():
+        latency[call] = {"all": _percentiles([seconds for round_number in rounds for seconds in rounds[round_number]])}
+        for round_number in sorted(rounds):
+            latency[call][round_number] = _percentiles(rounds[round_number])
+    return latency
+
+
+def _percentiles(samples: list) -> dict:
+    """Returns the nearest-rank p50, p90 and p99 and the max of samples (in seconds) in milliseconds."""
+    if len(samples) == 0: return {}
+    samples = sorted(samples)
+    percentiles = {"p" + str(p): round(samples[-(-p * len(samples) // 100) - 1] * 1000, 3) for p in (50, 90, 99)}
+    percentiles["max"] = round(samples[-1] * 1000, 3)
+    return percentiles
 
 
 if __name__ == "__main__":
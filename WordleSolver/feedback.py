@@ -0,0 +1,449 @@
+"""
+feedback.py
+by Fufs
+
+Feedback of a guess against a solution encoded as a single int: the state of position i (from 0) is the i-th base-3 digit, 0 - excluded (black/grey), 1 - included (yellow), 2 - correct (green).
+Duplicate letters follow wordle.play: a letter is yellow at its leftmost non-green positions, as many times as it appears at non-green positions of the solution.
+
+This module contains:
+    - EXCLUDED, INCLUDED, CORRECT   - states of a position.
+    - all_correct       - Returns the code of a guess equal to the solution.
+    - feedback          - Returns the feedback code of a guess against a solution.
+    - feedback_batch    - Returns an array of the feedback codes of a guess against many solutions.
+    - feedback_pairs    - Returns an array of the feedback codes of many guesses, each against its own solution.
+    - bincount          - Returns the number of occurances of every feedback code in an array of codes.
+    - partition         - Returns the feedback codes of a guess against every candidate and the number of candidates giving every code.
+    - consistent_bits   - Returns the bitset of the words of a Wordlist that give a guess a feedback code.
+    - LegalGuesses      - words of a Wordlist consistent with every hint revealed so far, the legal guesses of hard mode.
+    - to_round_state    - Returns the round_state (check format.txt) described by a feedback code.
+    - from_round_state  - Returns the feedback code described by a round_state.
+    - states            - Returns the list of states of every position described by a feedback code.
+    - FeedbackMatrix    - feedback codes of every (guess, solution) pair of two Wordlists.
+    - build_matrix      - Returns an array of the feedback codes of every guess against every solution, computed in parallel.
+    - matrix_key        - Returns the key identifying a feedback matrix of two Wordlists.
+    - get_matrix        - Returns the FeedbackMatrix of two Wordlists (dictionary.wordlist x dictionary.solution_list by default), loaded from or saved to a cache file.
+    - LazyFeedbackMatrix - FeedbackMatrix computed a row at a time on demand, keeping the most recent rows within a memory budget.
+    - matrix            - Returns a shared FeedbackMatrix of two Wordlists if it fits the memory budget, a LazyFeedbackMatrix otherwise.
+
+python -m WordleSolver.feedback checks feedback_batch, feedback_pairs and partition against feedback on random words.
+"""
+
+import hashlib
+import operator
+import os
+import sys
+from array import array
+from collections import OrderedDict
+
+from . import data_types, defaults, encoding, index, storage
+
+# Directory of the cached feedback matrices, WORDLESOLVER_CACHE overrides it
+CACHE_DIR = os.environ.get("WORDLESOLVER_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "WordleSolver"))
+ROWS_PER_TASK = 256
+# Bytes of feedback codes a matrix may keep in memory before matrix() switches to a LazyFeedbackMatrix
+DEFAULT_MEMORY_BUDGET = 64 * 2**20
+
+_matrices = {}
+
+EXCLUDED, INCLUDED, CORRECT = range(3)
+
+
+def all_correct(letters_per_word: int = 5) -> int:
+    """Returns the code of a guess equal to the solution."""
+    return 3 ** letters_per_word - 1
+
+
+def feedback(guess: str, solution: str) -> int:
+    """Returns the feedback code of a guess against a solution. Only the first len(solution) letters of guess are scored."""
+    letters_per_word = len(solution)
+    if len(guess) < letters_per_word: raise ValueError("guess is shorter than the solution")
+
+    states = [CORRECT if guess[i] == solution[i] else EXCLUDED for i in range(letters_per_word)]
+    unmatched = [solution[i] for i in range(letters_per_word) if states[i] != CORRECT]
+    if len(unmatched) > 0:
+        for i in range(letters_per_word):
+            if states[i] == EXCLUDED and guess[i] in unmatched:
+                states[i] = INCLUDED
+                unmatched.remove(guess[i])
+
+    code = 0
+    for state in reversed(states):
+        code = code * 3 + state
+    return code
+
+
+def feedback_batch(guess: str, solutions, letters_per_word: int = None) -> array:
+    """Returns an array of the feedback codes of a guess against every solution, in order.
+    solutions can be a Wordlist, a WordlistView, any list of words or the letter indices of the solutions as bytes. The array is of type 'B' if every code fits a byte, 'H' or 'I' otherwise."""
+    if letters_per_word is None:
+        letters_per_word = solutions.letters_per_word if hasattr(solutions, "letters_per_word") else len(guess)
+    if len(guess) < letters_per_word: raise ValueError("guess is shorter than the solutions")
+    codes = _encoded(solutions, letters_per_word)
+    size = len(codes) // letters_per_word
+
+    # Every solution gets a lane of width bytes inside a single int, so each step below handles all the solutions at once
+    typecode = _typecode(letters_per_word)
+    width = array(typecode).itemsize
+    columns = [codes[l::letters_per_word] for l in range(letters_per_word)]
+    guess_codes = [ord(letter) - 97 if "a" <= letter <= "z" else None for letter in guess[:letters_per_word]]
+
+    def lanes(column: bytes) -> int:
+        if width == 1: return int.from_bytes(column, "little")
+        expanded = bytearray(size * width)
+        expanded[::width] = column
+        return int.from_bytes(expanded, "little")
+
+    def constant(value: int) -> int:
+        return int.from_bytes(value.to_bytes(width, "little") * size, "little")
+
+    correct = [lanes(columns[l].translate(index._table(operator.eq, code))) if code is not None else 0 for l, code in enumerate(guess_codes)]
+    result = sum(CORRECT * correct[l] * 3**l for l in range(letters_per_word))
+
+    ones = constant(1)
+    for code in set(guess_codes):
+        if code is None: continue
+        guessed_positions = [l for l in range(letters_per_word) if guess_codes[l] == code]
+        # Occurances of the letter in the solution that aren't matched by a correct guess
+        unmatched = sum(lanes(column.translate(index._table(operator.eq, code))) for column in columns) - sum(correct[l] for l in guessed_positions)
+        # The k-th guessed occurance is included if it isn't correct and at most unmatched non-correct occurances come before or at it
+        matched_so_far = 0
+        for k, l in enumerate(guessed_positions, 1):
+            matched_so_far += correct[l]
+            fits = (unmatched + matched_so_far + constant(letters_per_word - k)).to_bytes(size * width, "little").translate(index._table(operator.ge, letters_per_word))
+            result += INCLUDED * (int.from_bytes(fits, "little") & (ones - correct[l])) * 3**l
+
+    feedback_codes = array(typecode)
+    feedback_codes.frombytes(result.to_bytes(size * width, "little"))
+    if sys.byteorder != "little": feedback_codes.byteswap()
+    return feedback_codes
+
+
+def feedback_pairs(guesses: list, solutions: list, letters_per_word: int = 5) -> array:
+    """Returns an array of the feedback codes of guesses[i] against solutions[i]. Pairs sharing a guess are scored by a single feedback_batch call."""
+    if len(guesses) != len(solutions): raise ValueError("Every guess needs a solution")
+
+    groups = {}
+    for i, guess in enumerate(guesses):
+        groups.setdefault(guess, []).append(i)
+
+    codes = array(_typecode(letters_per_word), bytes(array(_typecode(letters_per_word)).itemsize * len(guesses)))
+    for guess, pairs in groups.items():
+        for i, code in zip(pairs, feedback_batch(guess, [solutions[i] for i in pairs], letters_per_word)):
+            codes[i] = code
+    return codes
+
+
+def bincount(codes, letters_per_word: int = 5) -> list:
+    """Returns the list of the number of occurances of every feedback code (from 0 to all_correct) in codes."""
+    counts = [0] * (all_correct(letters_per_word) + 1)
+    for code in codes:
+        counts[code] += 1
+    return counts
+
+
+def partition(guess: str, candidates, letters_per_word: int = None) -> tuple:
+    """Returns (codes, sizes): the feedback codes of guess against every candidate (check feedback_batch) and sizes[code], the number of candidates giving guess the feedback code."""
+    if letters_per_word is None:
+        letters_per_word = candidates.letters_per_word if hasattr(candidates, "letters_per_word") else len(guess)
+    codes = feedback_batch(guess, candidates, letters_per_word)
+    return codes, bincount(codes, letters_per_word)
+
+
+def consistent_bits(guess: str, code: int, wordlist: data_types.Wordlist) -> int:
+    """Returns the bitset of the words of wordlist that, as the solution, give guess the feedback code. Check encoding.bitset_indices.
+    The bits of a WordlistView stand for the indices of its parent."""
+    codes = feedback_batch(guess, wordlist, wordlist.letters_per_word)
+    if isinstance(wordlist, data_types.WordlistView):
+        return encoding.indices_bitset(wordlist.indices[i] for i, word_code in enumerate(codes) if word_code == code)
+    if codes.typecode == "B": return index._bits_where(codes.tobytes(), operator.eq, code)
+    return encoding.indices_bitset(i for i, word_code in enumerate(codes) if word_code == code)
+
+
+class LegalGuesses:
+    """Words of a Wordlist consistent with every hint revealed so far, i.e. the guesses allowed in hard mode.
+    Kept as a bitset narrowed by every round (update), so checking a guess is a lookup and a bit test instead of a replay of the game."""
+    __slots__ = ("wordlist", "bits", "_all_words")
+
+    def __init__(self, wordlist: data_types.Wordlist) -> None:
+        self.wordlist = wordlist
+        self._all_words = (1 << len(wordlist)) - 1
+        self.bits = self._all_words
+
+    def update(self, guess: str, code: int) -> None:
+        """Removes the words inconsistent with the feedback code of guess. Only the words that are still legal are scored."""
+        self.bits = consistent_bits(guess, code, self.wordlist if self.bits == self._all_words else self.view())
+
+    def __contains__(self, word: str) -> bool:
+        i = self.wordlist.find(word)
+        return i != -1 and self.bits >> i & 1 == 1
+
+    def __len__(self) -> int:
+        return self.bits.bit_count()
+
+    def view(self) -> data_types.WordlistView:
+        """Returns the legal guesses as a WordlistView of the wordlist."""
+        return data_types.WordlistView.from_bits(self.wordlist, self.bits)
+
+
+def to_round_state(guess: str, code: int, letters_per_word: int = 5) -> dict:
+    """Returns the round_state (check format.txt) described by a feedback code, exactly as built by wordle.play."""
+    positions = {}
+    for i in range(letters_per_word):
+        positions.setdefault(guess[i], []).append(i + 1)
+
+    digits = states(code, letters_per_word)
+    round_state = {"excluded": {}, "included": {}, "correct": {}}
+    for letter in positions:
+        if all(digits[position - 1] == EXCLUDED for position in positions[letter]):
+            round_state["excluded"][letter] = set(positions[letter])
+            continue
+
+        correct = {position for position in positions[letter] if digits[position - 1] == CORRECT}
+        if len(correct) > 0:
+            round_state["correct"][letter] = correct
+        round_state["included"][letter] = {position for position in positions[letter] if digits[position - 1] == INCLUDED}
+        excluded = {position for position in positions[letter] if digits[position - 1] == EXCLUDED}
+        if len(excluded) > 0:
+            round_state["excluded"][letter] = excluded
+
+    return round_state
+
+
+def from_round_state(round_state: dict) -> int:
+    """Returns the feedback code described by a round_state."""
+    code = 0
+    for state, key in ((INCLUDED, "included"), (CORRECT, "correct")):
+        for letter in round_state[key]:
+            for position in round_state[key][letter]:
+                code += state * 3 ** (position - 1)
+    return code
+
+
+def states(code: int, letters_per_word: int = 5) -> list:
+    """Returns the list of states of every position described by a feedback code."""
+    digits = []
+    for i in range(letters_per_word):
+        code, state = divmod(code, 3)
+        digits.append(state)
+    return digits
+
+
+class FeedbackMatrix:
+    """Feedback codes of every (guess, solution) pair of two Wordlists, one row of len(solutions) codes per guess."""
+    def __init__(self, guesses: data_types.Wordlist, solutions: data_types.Wordlist, codes) -> None:
+        if guesses.letters_per_word != solutions.letters_per_word: raise TypeError("letters_per_word mismatch")
+        if len(codes) != len(guesses) * len(solutions): raise ValueError("The matrix doesn't have a code for every pair")
+        self.letters_per_word = guesses.letters_per_word
+        self.guesses = guesses
+        self.solutions = solutions
+        self.codes = codes
+
+    def __deepcopy__(self, memo: dict) -> "FeedbackMatrix":
+        # Shared by every player of the same wordlists and never modified, copies of a player (e.g. MemoizedPlayer snapshots) keep sharing it
+        return self
+
+    def row(self, guess_index: int):
+        """Returns the codes of the guess with index guess_index against every solution, in the order of solutions."""
+        return self.codes[guess_index * len(self.solutions):(guess_index + 1) * len(self.solutions)]
+
+    def feedback(self, guess: str, solution: str) -> int:
+        """Returns the feedback code of a guess against a solution, both have to be in the matrix."""
+        guess_index, solution_index = self.guesses.find(guess), self.solutions.find(solution)
+        if guess_index == -1 or solution_index == -1: raise KeyError((guess, solution))
+        return self.codes[guess_index * len(self.solutions) + solution_index]
+
+    def __getitem__(self, indices: tuple) -> int:
+        guess_index, solution_index = indices
+        return self.codes[guess_index * len(self.solutions) + solution_index]
+
+
+class LazyFeedbackMatrix:
+    """FeedbackMatrix of two Wordlists too large to precompute. Rows are computed by feedback_batch on first use and the most recently used ones are kept
+    within memory_budget bytes (at least one row). hits, misses and evictions count row lookups, check stats()."""
+    def __init__(self, guesses: data_types.Wordlist, solutions: data_types.Wordlist, memory_budget: int = DEFAULT_MEMORY_BUDGET) -> None:
+        if guesses.letters_per_word != solutions.letters_per_word: raise TypeError("letters_per_word mismatch")
+        self.letters_per_word = guesses.letters_per_word
+        self.guesses = guesses
+        self.solutions = solutions
+        self.memory_budget = memory_budget
+
+        self._solution_codes = _encoded(solutions, self.letters_per_word)
+        self._row_bytes = len(solutions) * array(_typecode(self.letters_per_word)).itemsize
+        self.max_rows = max(1, memory_budget // max(1, self._row_bytes))
+        self._rows = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __deepcopy__(self, memo: dict) -> "LazyFeedbackMatrix":
+        # Shared by every player of the same wordlists and never modified, copies of a player (e.g. MemoizedPlayer snapshots) keep sharing it
+        return self
+
+    def row(self, guess_index: int) -> array:
+        """Returns the codes of the guess with index guess_index against every solution, in the order of solutions."""
+        if guess_index in self._rows:
+            self.hits += 1
+            self._rows.move_to_end(guess_index)
+            return self._rows[guess_index]
+
+        self.misses += 1
+        codes = feedback_batch(self.guesses[guess_index], self._solution_codes, self.letters_per_word)
+        self._rows[guess_index] = codes
+        if len(self._rows) > self.max_rows:
+            self._rows.popitem(last=False)
+            self.evictions += 1
+        return codes
+
+    def feedback(self, guess: str, solution: str) -> int:
+        """Returns the feedback code of a guess against a solution, both have to be in the matrix."""
+        guess_index, solution_index = self.guesses.find(guess), self.solutions.find(solution)
+        if guess_index == -1 or solution_index == -1: raise KeyError((guess, solution))
+        return self.row(guess_index)[solution_index]
+
+    def __getitem__(self, indices: tuple) -> int:
+        guess_index, solution_index = indices
+        return self.row(guess_index)[solution_index]
+
+    def stats(self) -> dict:
+        """Returns the row cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups > 0 else 0.0,
+            "cached_rows": len(self._rows),
+            "max_rows": self.max_rows,
+            "memory_used": len(self._rows) * self._row_bytes,
+            "memory_budget": self.memory_budget,
+        }
+
+    def clear(self) -> None:
+        """Drops every cached row and resets the statistics."""
+        self._rows.clear()
+        self.hits = self.misses = self.evictions = 0
+
+
+def matrix(guesses: data_types.Wordlist, solutions: data_types.Wordlist, memory_budget: int = DEFAULT_MEMORY_BUDGET, cache_dir: str = None, workers: int = None):
+    """Returns the FeedbackMatrix of two Wordlists from get_matrix if it fits memory_budget bytes, a LazyFeedbackMatrix with that budget otherwise.
+    Either is shared by every caller in the process asking for the same Wordlists."""
+    if len(guesses) * len(solutions) * array(_typecode(guesses.letters_per_word)).itemsize <= memory_budget:
+        return get_matrix(guesses, solutions, cache_dir, workers)
+
+    key = (matrix_key(guesses, solutions), memory_budget)
+    if key not in _matrices:
+        _matrices[key] = LazyFeedbackMatrix(guesses, solutions, memory_budget)
+    return _matrices[key]
+
+
+def build_matrix(guesses: data_types.Wordlist, solutions: data_types.Wordlist, workers: int = None) -> array:
+    """Returns an array of the feedback codes of every guess against every solution, row by row. Rows are computed by feedback_batch in a pool of workers processes (all cores by default, 1 to stay in this process)."""
+    if guesses.letters_per_word != solutions.letters_per_word: raise TypeError("letters_per_word mismatch")
+    tasks = [(start, min(start + ROWS_PER_TASK, len(guesses))) for start in range(0, len(guesses), ROWS_PER_TASK)]
+    arguments = (list(guesses), _encoded(solutions, solutions.letters_per_word), solutions.letters_per_word)
+
+    if workers is None: workers = os.cpu_count() or 1
+    if workers <= 1 or len(tasks) <= 1:
+        _start_matrix_worker(*arguments)
+        rows = [_matrix_rows(*task) for task in tasks]
+    else:
+        # Imported here as it is slow to import and only needed to build a matrix
+        import concurrent.futures
+        with concurrent.futures.ProcessPoolExecutor(min(workers, len(tasks)), initializer=_start_matrix_worker, initargs=arguments) as executor:
+            rows = list(executor.map(_matrix_rows, *zip(*tasks)))
+
+    codes = array(_typecode(guesses.letters_per_word))
+    for chunk in rows:
+        codes.frombytes(chunk)
+    return codes
+
+
+def matrix_key(guesses: data_types.Wordlist, solutions: data_types.Wordlist) -> bytes:
+    """Returns the key (sha256 digest) identifying a feedback matrix of two Wordlists."""
+    digest = hashlib.sha256(str(guesses.letters_per_word).encode())
+    for wordlist in (guesses, solutions):
+        digest.update(b"|")
+        digest.update("\n".join(wordlist).encode())
+    return digest.digest()
+
+
+def get_matrix(guesses: data_types.Wordlist = None, solutions: data_types.Wordlist = None, cache_dir: str = None, workers: int = None) -> FeedbackMatrix:
+    """Returns the FeedbackMatrix of two Wordlists (dictionary.wordlist x dictionary.solution_list by default).
+    The matrix is built once per process, and once per host as it is saved to a cache file in cache_dir (CACHE_DIR by default) and later mapped from it.
+    A cache file that fails its checksum is rebuilt."""
+    if guesses is None: guesses = defaults.wordlist()
+    if solutions is None: solutions = data_types.Wordlist(defaults.solution_list())
+
+    key = matrix_key(guesses, solutions)
+    if key in _matrices: return _matrices[key]
+
+    path = os.path.join(CACHE_DIR if cache_dir is None else cache_dir, "feedback-" + key.hex()[:32] + ".bin")
+    try:
+        # Checked once per process (about 30 ms for the default matrix), a damaged file would give wrong codes to every later run
+        codes = storage.load_matrix(path, key, verify=True)[0]
+    except (OSError, ValueError):
+        codes = build_matrix(guesses, solutions, workers)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            storage.save_matrix(codes, len(guesses), len(solutions), guesses.letters_per_word, key, path)
+            codes = storage.load_matrix(path, key)[0]
+        except OSError:
+            pass
+
+    _matrices[key] = FeedbackMatrix(guesses, solutions, codes)
+    return _matrices[key]
+
+
+_worker_guesses = _worker_solutions = _worker_letters_per_word = None
+
+def _start_matrix_worker(guesses: list, solutions: bytes, letters_per_word: int) -> None:
+    global _worker_guesses, _worker_solutions, _worker_letters_per_word
+    _worker_guesses, _worker_solutions, _worker_letters_per_word = guesses, solutions, letters_per_word
+
+def _matrix_rows(start: int, stop: int) -> bytes:
+    return b"".join(feedback_batch(guess, _worker_solutions, _worker_letters_per_word).tobytes() for guess in _worker_guesses[start:stop])
+
+
+def _typecode(letters_per_word: int) -> str:
+    """Returns the array typecode of the smallest unsigned int that holds every feedback code."""
+    return "B" if all_correct(letters_per_word) < 2**8 else "H" if all_correct(letters_per_word) < 2**16 else "I"
+
+
+def _encoded(solutions, letters_per_word: int) -> bytes:
+    if isinstance(solutions, bytes): return solutions
+    if isinstance(solutions, data_types.Wordlist): return solutions.encoded.tobytes()
+    if isinstance(solutions, data_types.WordlistView): return solutions.encoded
+    return encoding.encode_wordlist(list(solutions), letters_per_word).tobytes()
+
+
+def _self_check(words: int = 250, seed: int = 0) -> None:
+    """Compares feedback_batch, feedback_pairs and partition with feedback, scored one pair at a time, on words random words of every length from 1 to 12 letters.
+    Raises AssertionError on the first mismatch."""
+    import random
+    rng = random.Random(seed)
+    for letters_per_word in range(1, 13):
+        # Mostly drawn from a few letters, so that repeated letters (the hard cases of the lane arithmetic) are common
+        solutions = ["".join(rng.choice("aabcde" if rng.random() < 0.7 else encoding.ALPHABET) for _ in range(letters_per_word)) for _ in range(words)]
+        wordlist = data_types.Wordlist(solutions, letters_per_word)
+        for guess in rng.sample(solutions, min(words, 16)):
+            assert list(feedback_batch(guess, solutions, letters_per_word)) == [feedback(guess, solution) for solution in solutions], (guess, letters_per_word)
+            expected = [feedback(guess, solution) for solution in wordlist]
+            assert list(feedback_batch(guess, wordlist)) == expected, (guess, letters_per_word)
+            codes, sizes = partition(guess, wordlist)
+            assert list(codes) == expected and [size for size in sizes if size > 0] == [expected.count(code) for code in sorted(set(expected))], (guess, letters_per_word)
+
+        guesses = [rng.choice(solutions) for _ in solutions]
+        assert list(feedback_pairs(guesses, solutions, letters_per_word)) == [feedback(guess, solution) for guess, solution in zip(guesses, solutions)], letters_per_word
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Checks feedback_batch, feedback_pairs and partition against feedback on random words.")
+    parser.add_argument("-w", "--words", type=int, default=250, help="random words of every length")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    _self_check(args.words, args.seed)
+    print("ok")
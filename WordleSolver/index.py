@@ -0,0 +1,237 @@
+"""
+index.py
+by Fufs
+
+Precomputed per-word indexes used to turn word filtering into bitmask tests.
+
+This module contains:
+    - WordIndex     - per-word letter masks, letter codes and letter multiplicities of a Wordlist.
+    - get_index     - Returns the WordIndex of a Wordlist, shared between all Wordlists with the same contents.
+    - letters_mask  - Returns the 26-bit mask of the letters in a word (a = bit 0).
+
+Bitsets are python ints in which bit i stands for the i-th word of the Wordlist. Check encoding.bitset_indices.
+
+python -m WordleSolver.index checks WordIndex.solutions against the rules of utils.solution_finder applied one word at a time on random positions.
+"""
+
+import functools
+import operator
+import sys
+from array import array
+from collections import OrderedDict
+
+from . import data_types, encoding
+
+# Most recently used indexes, shared between every Wordlist (and so every player) built from the same dictionary
+_indexes = OrderedDict()
+MAX_SHARED_INDEXES = 16
+# Smaller wordlists (e.g. remaining candidates) are indexed privately, they are cheap to index and would evict the dictionaries
+MIN_SHARED_SIZE = 1024
+
+
+class WordIndex:
+    """Per-word letter masks, letter codes and letter multiplicities of a Wordlist, in the order of the Wordlist.
+    Every part except the codes is computed on first use; masks can be supplied (e.g. loaded from storage)."""
+    def __init__(self, wordlist: data_types.Wordlist, masks=None) -> None:
+        self.letters_per_word = wordlist.letters_per_word
+        self.size = len(wordlist)
+        self.all_words = (1 << self.size) - 1
+
+        # codes[i*letters_per_word + l] is the letter index at position l+1 of word i
+        self.codes = wordlist.encoded
+        # masks[i] has bit code set if the letter code appears in word i
+        self._masks = masks
+        # multiplicity[i*26 + code] is the number of occurances of the letter code in word i
+        self._multiplicity = None
+        # Inverted indexes
+        # position_bits[l][code] - words with the letter code at position l+1
+        # count_bits[code][n]    - words with at least n occurances of the letter code (n from 0 to letters_per_word)
+        self._position_bits = None
+        self._count_bits = None
+        self._unique_letters = None
+
+    @property
+    def masks(self):
+        if self._masks is None: self.__count_letters()
+        return self._masks
+
+    @property
+    def multiplicity(self) -> array:
+        if self._multiplicity is None: self.__count_letters()
+        return self._multiplicity
+
+    @property
+    def position_bits(self) -> list:
+        if self._position_bits is None:
+            self._position_bits = []
+            for l in range(self.letters_per_word):
+                column = self.codes[l::self.letters_per_word].tobytes()
+                self._position_bits.append([_bits_where(column, operator.eq, code) for code in range(encoding.ALPHABET_SIZE)])
+        return self._position_bits
+
+    @property
+    def count_bits(self) -> list:
+        if self._count_bits is None:
+            self._count_bits = []
+            for code in range(encoding.ALPHABET_SIZE):
+                column = self.multiplicity[code::encoding.ALPHABET_SIZE].tobytes()
+                self._count_bits.append([self.all_words] + [_bits_where(column, operator.ge, n) for n in range(1, self.letters_per_word + 1)])
+        return self._count_bits
+
+    def __count_letters(self) -> None:
+        # Computed a whole column at a time, treating bytes as the 8-bit lanes of a single int
+        self._multiplicity = array("B", bytes(self.size * encoding.ALPHABET_SIZE))
+        masks = array("L", bytes(array("L").itemsize * self.size))
+
+        columns = [self.codes[l::self.letters_per_word].tobytes() for l in range(self.letters_per_word)]
+        mask_planes = [0] * masks.itemsize
+        multiplicity = memoryview(self._multiplicity)
+        for code in range(encoding.ALPHABET_SIZE):
+            count = sum(int.from_bytes(column.translate(_table(operator.eq, code)), "little") for column in columns)
+            multiplicity[code::encoding.ALPHABET_SIZE] = count.to_bytes(self.size, "little")
+            present = count.to_bytes(self.size, "little").translate(_table(operator.gt, 0))
+            mask_planes[code // 8] |= int.from_bytes(present, "little") << (code % 8)
+
+        if self._masks is None:
+            mask_bytes = memoryview(masks).cast("B")
+            # Plane i is byte i of every mask in little-endian order
+            for i in range(masks.itemsize):
+                mask_bytes[i::masks.itemsize] = mask_planes[i].to_bytes(self.size, "little")
+            mask_bytes.release()
+            if sys.byteorder != "little": masks.byteswap()
+            self._masks = masks
+
+    def solutions(self, positions) -> int:
+        """Returns the bitset of words that satisfy positions (Positions or CompactPositions), following the rules of utils.solution_finder."""
+        if not isinstance(positions, data_types.CompactPositions):
+            positions = data_types.CompactPositions.from_positions(positions)
+        state = positions.state
+        all_positions = (1 << self.letters_per_word) - 1
+        position_bits, count_bits = self.position_bits, self.count_bits
+
+        candidates = self.all_words
+        for code in range(encoding.ALPHABET_SIZE):
+            minimum, maximum, allowed_positions = state[code*4:code*4 + 3]
+            # Only the words that contain the letter are checked against its limits
+            if minimum > 1 or maximum < self.letters_per_word:
+                candidates &= ~count_bits[code][1] | self.count_between(code, minimum, maximum)
+            if allowed_positions & all_positions != all_positions:
+                for l in range(self.letters_per_word):
+                    if not allowed_positions >> l & 1:
+                        candidates &= ~position_bits[l][code]
+
+        for l in range(self.letters_per_word):
+            required_letters = positions.position(l + 1)[data_types.CompactPositions.REQUIRED]
+            if required_letters == 0: continue
+            allowed = 0
+            for code in range(encoding.ALPHABET_SIZE):
+                if required_letters >> code & 1:
+                    allowed |= position_bits[l][code]
+            candidates &= allowed
+
+        return candidates
+
+    def count_between(self, code: int, minimum: int, maximum: int) -> int:
+        """Returns the bitset of words with between minimum and maximum (inclusive) occurances of the letter code."""
+        counts = self.count_bits[code]
+        if minimum > self.letters_per_word or minimum > maximum: return 0
+        return counts[max(minimum, 0)] & ~counts[maximum + 1] if maximum < self.letters_per_word else counts[max(minimum, 0)]
+
+    def unique_letters(self) -> list:
+        """Returns the indices of the words made of letters_per_word different letters."""
+        if self._unique_letters is None:
+            masks = self.masks
+            self._unique_letters = [i for i in range(self.size) if masks[i].bit_count() == self.letters_per_word]
+        return self._unique_letters
+
+    def without_letters(self, mask: int, unique_letters: bool = False) -> list:
+        """Returns the indices of the words that contain none of the letters in mask (and only unique letters if requested)."""
+        masks = self.masks
+        return [i for i in (self.unique_letters() if unique_letters else range(self.size)) if not masks[i] & mask]
+
+
+def get_index(wordlist: data_types.Wordlist, masks=None) -> WordIndex:
+    """Returns the WordIndex of a Wordlist, shared between all Wordlists with the same contents. masks are only used when a new index is built."""
+    if wordlist.__dict__.get("_index") is None:
+        key = (wordlist.letters_per_word, tuple(wordlist))
+        if key in _indexes:
+            _indexes.move_to_end(key)
+            wordlist._index = _indexes[key]
+        else:
+            wordlist._index = WordIndex(wordlist, masks)
+            if len(wordlist) >= MIN_SHARED_SIZE:
+                _indexes[key] = wordlist._index
+                if len(_indexes) > MAX_SHARED_INDEXES: _indexes.popitem(last=False)
+    return wordlist._index
+
+
+@functools.lru_cache(maxsize=None)
+def _table(operator, operand: int, true: int = 1, false: int = 0) -> bytes:
+    """Returns a bytes.translate table mapping every byte value to true or false depending on operator(value, operand)."""
+    return bytes(true if operator(value, operand) else false for value in range(256))
+
+
+def _bits_where(column: bytes, operator, operand: int) -> int:
+    """Returns the bitset of the entries of column for which operator(entry, operand) is true."""
+    return int(column.translate(_table(operator, operand, ord("1"), ord("0")))[::-1] or b"0", 2)
+
+
+def letters_mask(letters) -> int:
+    """Returns the 26-bit mask of the letters in a word (a = bit 0)."""
+    mask = 0
+    for code in encoding.encode_word("".join(letters)):
+        mask |= 1 << code
+    return mask
+
+
+def _matches(word: str, positions) -> bool:
+    """Returns whether word satisfies positions (Positions), checked letter by letter with the rules of utils.solution_finder."""
+    letters = {}
+    for i in range(len(word)):
+        letters.setdefault(word[i], set()).add(i + 1)
+
+    for letter in letters:
+        if not positions[letter][0] <= len(letters[letter]) <= positions[letter][1] or not letters[letter].issubset(positions[letter][2]): return False
+        for position in letters[letter]:
+            if len(positions[position][1]) > 0 and letter not in positions[position][1]: return False
+    return True
+
+
+def _self_check(states: int = 600, seed: int = 0) -> None:
+    """Compares WordIndex.solutions (given Positions and CompactPositions) and utils.solution_finder with _matches on states random positions of 3 to 7 letter words.
+    Raises AssertionError on the first mismatch."""
+    import random
+    from . import utils
+    rng = random.Random(seed)
+    for n in range(states):
+        letters_per_word = 3 + n % 5
+        # Mostly drawn from a few letters, so that positions keep some of the words and repeated letters are common
+        wordlist = data_types.Wordlist(["".join(rng.choice("aabcdef" if rng.random() < 0.8 else encoding.ALPHABET) for _ in range(letters_per_word)) for _ in range(300)], letters_per_word)
+        secret = rng.choice(wordlist)
+
+        # Limits mostly kept by a secret word, so that the result is rarely empty
+        positions = data_types.Positions(letters_per_word)
+        for letter in rng.sample(encoding.ALPHABET, rng.randint(0, 8)):
+            count = secret.count(letter) if rng.random() < 0.8 else rng.randint(0, 2)
+            positions[letter][0] = rng.randint(0, count)
+            positions[letter][1] = rng.randint(count, letters_per_word)
+            positions[letter][2] = {position for position in positions[letter][2] if secret[position - 1] == letter or rng.random() < 0.7}
+        for position in rng.sample(range(1, letters_per_word + 1), rng.randint(0, 2)):
+            positions[position][1] = {secret[position - 1]} | set(rng.sample(encoding.ALPHABET, rng.randint(0, 2)))
+
+        expected = [word for word in wordlist if _matches(word, positions)]
+        for given in (positions, data_types.CompactPositions.from_positions(positions)):
+            assert [wordlist[i] for i in encoding.bitset_indices(get_index(wordlist).solutions(given))] == expected, (n, secret)
+        assert list(utils.solution_finder(wordlist, positions)) == expected, (n, secret)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Checks WordIndex.solutions against the rules of utils.solution_finder on random positions.")
+    parser.add_argument("-n", "--states", type=int, default=600)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    _self_check(args.states, args.seed)
+    print("ok")
@@ -6,45 +6,126 @@ This module contains:
     - Player            - abstract class used to create players for the wordle game.
     - HumanPlayer       - sub-class of Player, used to play the wordle game directly. Used for testing purposes of the python Wordle implementation.
     - ComputerPlayer    - abstract class used to create computer player (includes check_letters implementation) 
+    - MemoizedPlayer    - wrapper of a deterministic player that remembers its guesses for every feedback history, shared by all games in the process.
 """
 
+import copy
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from . import utils
-from . import dictionary
+from . import defaults
 from . import data_types
+from . import feedback
 
 
 class Player(ABC):
-    def __init__(self, dictionary: list = dictionary.wordlist, letters_per_word: int = 5, rounds_per_game: int = 6):
+    def __init__(self, dictionary: list = None, letters_per_word: int = 5, rounds_per_game: int = 6, hard_mode: bool = False):
         super().__init__()
+        if dictionary is None: dictionary = defaults.wordlist(letters_per_word)
         self._letters_per_word = letters_per_word
         self._rounds_per_game = rounds_per_game
         self._wordlist = data_types.Wordlist(dictionary, letters_per_word)
         self._round = 0
+        # In hard mode every guess has to be consistent with all the hints revealed so far, _legal_guesses keeps track of the words that are
+        self._hard_mode = hard_mode
+        self._legal_guesses = feedback.LegalGuesses(self._wordlist) if hard_mode else None
 
     @abstractmethod
     def check_letters(self, round_state):
         pass
 
+    def check_feedback(self, guess: str, code: int) -> None:
+        """Receives the result of a round as a feedback code (check feedback.py). Passes it on to check_letters as a round_state unless overridden.
+        Overrides have to call it (or update _legal_guesses themselves) in hard mode."""
+        if self._legal_guesses is not None: self._legal_guesses.update(guess, code)
+        self.check_letters(feedback.to_round_state(guess, code, self._letters_per_word))
+
+    def start_boards(self, boards: int) -> None:
+        """Called by wordle.play_multi before the first guess of a game on several boards."""
+        self._boards = boards
+
+    def check_boards_feedback(self, guess: str, codes: list) -> None:
+        """Receives the result of a round of wordle.play_multi, codes[board] being the feedback code of the board or None if it was solved in an earlier round.
+        Passes every code on to check_feedback unless overridden."""
+        for code in codes:
+            if code is not None: self.check_feedback(guess, code)
+
     @abstractmethod
     def guess(self):
         pass
 
 
 class ComputerPlayer(Player):
-    def __init__(self, dictionary: list | str = dictionary.wordlist, letters_per_word: int = 5, rounds_per_game: int = 6):
+    # Whether guess picks from _board_candidates in a game on several boards (wordle.play_multi), check start_boards
+    multi_board = False
+
+    def __init__(self, dictionary: list | str = None, letters_per_word: int = 5, rounds_per_game: int = 6, hard_mode: bool = False):
 
         if type(dictionary) == str:
             super().__init__(
-                open(dictionary).read().splitlines(), letters_per_word, rounds_per_game
+                open(dictionary).read().splitlines(), letters_per_word, rounds_per_game, hard_mode
             )
         else:
-            super().__init__(dictionary, letters_per_word, rounds_per_game)
+            super().__init__(dictionary, letters_per_word, rounds_per_game, hard_mode)
 
         self._global_scoring_rubric = utils.create_scoring_rubric(self._wordlist)
         self._positions = data_types.Positions(letters_per_word)
         self._potential_solutions = self._wordlist
 
+    @property
+    def feedback_matrix(self):
+        """Feedback codes of every word of the wordlist against every word of the wordlist, shared by all players of the same dictionary.
+        Built on first use, computed lazily within feedback.DEFAULT_MEMORY_BUDGET for dictionaries too large to precompute. Check feedback.matrix.
+        Kept by the player after the first access, as looking up the shared matrix hashes both wordlists."""
+        if self.__dict__.get("_feedback_matrix") is None:
+            self._feedback_matrix = feedback.matrix(self._wordlist, self._wordlist)
+        return self._feedback_matrix
+
+    def allowed_guesses(self, wordlist):
+        """Returns the words of wordlist (the wordlist of the player, a WordlistView of it or any list of words) that can be guessed this round.
+        That is all of them, unless in hard mode only those consistent with the hints revealed so far. Subclasses pick their guesses from it to play hard mode."""
+        if self._legal_guesses is None or len(self._legal_guesses) == len(self._wordlist): return wordlist
+        if wordlist is self._wordlist: return self._legal_guesses.view()
+        if isinstance(wordlist, data_types.WordlistView) and wordlist.parent is self._wordlist: return wordlist.narrow(self._legal_guesses.bits)
+        if isinstance(wordlist, data_types.Wordlist): return data_types.Wordlist.from_sorted([word for word in wordlist if word in self._legal_guesses], wordlist.letters_per_word)
+        return [word for word in wordlist if word in self._legal_guesses]
+
+    def start_boards(self, boards: int) -> None:
+        """Starts a set of candidates (every word of the wordlist) for every board.
+        check_boards_feedback only narrows those candidates, not _positions, _potential_solutions or _legal_guesses, so a guess written for a single board
+        would learn nothing. Subclasses that play several boards override guess to pick from _board_candidates (e.g. with score_boards) and set multi_board."""
+        if not self.multi_board: raise NotImplementedError(type(self).__name__ + " doesn't support several boards, check ComputerPlayer.start_boards")
+        super().start_boards(boards)
+        self._board_candidates = [feedback.LegalGuesses(self._wordlist) for _ in range(boards)]
+        self._solved_boards = [False] * boards
+
+    def check_boards_feedback(self, guess: str, codes: list) -> None:
+        """Narrows the candidates of every board that wasn't solved before this round."""
+        for board, code in enumerate(codes):
+            if code is None: continue
+            self._board_candidates[board].update(guess, code)
+            if code == feedback.all_correct(self._letters_per_word): self._solved_boards[board] = True
+
+    def score_boards(self, guesses) -> list:
+        """Returns the score (check aggregate_board_scores) of every guess against the candidates of all unsolved boards.
+        The candidates of every board are concatenated, so each guess is scored by a single feedback_batch call."""
+        views = [self._board_candidates[board].view() for board in range(self._boards) if not self._solved_boards[board]]
+        bounds = [0]
+        for view in views:
+            bounds.append(bounds[-1] + len(view))
+        candidates = b"".join(view.encoded for view in views)
+
+        scores = []
+        for guess in guesses:
+            codes = feedback.feedback_batch(guess, candidates, self._letters_per_word)
+            scores.append(self.aggregate_board_scores([[size for size in feedback.bincount(codes[bounds[i]:bounds[i + 1]], self._letters_per_word) if size > 0] for i in range(len(views))]))
+        return scores
+
+    def aggregate_board_scores(self, partitions: list) -> float:
+        """Returns the score of a guess given, for every unsolved board, the sizes of the groups its candidates are split into by the feedback of the guess.
+        The default is the expected number of candidates left, summed over the boards (lower is better). Override to rank guesses differently."""
+        return sum(sum(size * size for size in sizes) / sum(sizes) for sizes in partitions if len(sizes) > 0)
+
     def check_letters(self, round_state: dict) -> None:  # TODO: Add exceptions
         """"""
         # Included (Yellow) letters
@@ -92,8 +173,8 @@ class ComputerPlayer(Player):
 
 
 class HumanPlayer(Player):
-    def __init__(self, dictionary: list = dictionary.wordlist, letters_per_word: int = 5, rounds_per_game: int = 6) -> None:
-        super().__init__(dictionary, letters_per_word, rounds_per_game)
+    def __init__(self, dictionary: list = None, letters_per_word: int = 5, rounds_per_game: int = 6, hard_mode: bool = False) -> None:
+        super().__init__(dictionary, letters_per_word, rounds_per_game, hard_mode)
 
     def check_letters(self, round_state: dict) -> None:
         boxes = ["" for i in range(self._letters_per_word)]
@@ -121,7 +202,110 @@ class HumanPlayer(Player):
                 print(
                     "The word must have", self._letters_per_word, "letters. Try again."
                 )
-            elif utils.find_word(self._wordlist, query) == -1:
+            elif self._wordlist.find(query) == -1:
                 print(query, "is not in wordlist. Try again.")
+            elif self._legal_guesses is not None and query not in self._legal_guesses:
+                print(query, "doesn't use all the hints revealed so far (hard mode). Try again.")
             else:
                 return query, "", -1
+
+
+
+class MemoizedPlayer:
+    """
+    Wraps a deterministic player (player_class(**player_kwargs)) and remembers its guesses in a trie keyed by the feedback codes received so far,
+    shared by every MemoizedPlayer of the same player class and arguments in the process. Known guesses are returned without asking the player.
+    At the first unknown node of a game a copy of the player is restored from the closest snapshot on the way to the node (or a new player is created)
+    and the rest of the game so far is replayed to it, then it plays the rest of the game. Snapshots are taken while replaying, i.e. only of nodes
+    that more than one game has continued from. Use it with evaluate_player as
+    player_class=MemoizedPlayer, player_kwargs={"player_class": ..., "player_kwargs": ...}.
+    """
+    # Snapshots (copies of the player taken before it receives the feedback of a node) kept per decision tree, the least recently used are dropped first
+    MAX_SNAPSHOTS = 128
+
+    def __init__(self, player_class, player_kwargs: dict = None, hard_mode: bool = False) -> None:
+        self._player_class = player_class
+        self._player_kwargs = dict(player_kwargs or {})
+        if hard_mode: self._player_kwargs["hard_mode"] = True
+        self._tree = _DecisionTree.get(player_class, self._player_kwargs, MemoizedPlayer.MAX_SNAPSHOTS)
+        # Nodes from the root to the current node, history[i] is the (guess, code) that leads from path[i] to path[i+1]
+        self._path = [self._tree.root]
+        self._history = []
+        self._player = None
+
+    def guess(self):
+        node = self._path[-1]
+        if self._player is None:
+            if node.guessed is not None: return node.guessed
+            self.__restore()
+
+        guessed = self._player.guess()
+        if node.guessed is None: node.guessed = guessed
+        elif node.guessed[0] != guessed[0]: raise RuntimeError(self._player_class.__name__ + " isn't deterministic and can't be memoized")
+        return guessed
+
+    def check_feedback(self, guess: str, code: int) -> None:
+        if self._player is not None: self._player.check_feedback(guess, code)
+        self._history.append((guess, code))
+        self._path.append(self._path[-1].child(code))
+
+    def __restore(self) -> None:
+        start = len(self._history) - 1
+        while start >= 0 and self._path[start].snapshot is None:
+            start -= 1
+
+        if start >= 0:
+            self._player = copy.deepcopy(self._tree.load(self._path[start]))
+            self._player.check_feedback(*self._history[start])
+        else:
+            self._player = self._player_class(**self._player_kwargs)
+
+        for depth in range(start + 1, len(self._history)):
+            if self._player.guess()[0] != self._history[depth][0]: raise RuntimeError(self._player_class.__name__ + " isn't deterministic and can't be memoized")
+            # A node replayed is continued from by more than one game, later games start from its snapshot
+            self._tree.save(self._path[depth], copy.deepcopy(self._player))
+            self._player.check_feedback(*self._history[depth])
+
+    @staticmethod
+    def clear() -> None:
+        """Forgets the decision trees of every player."""
+        _DecisionTree.trees.clear()
+
+
+class _DecisionNode:
+    __slots__ = ("guessed", "children", "snapshot")
+
+    def __init__(self) -> None:
+        self.guessed = None
+        self.children = {}
+        self.snapshot = None
+
+    def child(self, code: int) -> "_DecisionNode":
+        if code not in self.children: self.children[code] = _DecisionNode()
+        return self.children[code]
+
+
+class _DecisionTree:
+    """Decision tree of a player memoized by MemoizedPlayer, with at most max_snapshots snapshots of the player."""
+    # Decision trees by player class and arguments, shared by all games in the process
+    trees = {}
+
+    def __init__(self, max_snapshots: int) -> None:
+        self.root = _DecisionNode()
+        self.max_snapshots = max_snapshots
+        self.snapshots = OrderedDict()
+
+    @classmethod
+    def get(cls, player_class, player_kwargs: dict, max_snapshots: int) -> "_DecisionTree":
+        key = (player_class, repr(sorted(player_kwargs.items())))
+        if key not in cls.trees: cls.trees[key] = cls(max_snapshots)
+        return cls.trees[key]
+
+    def save(self, node: _DecisionNode, snapshot) -> None:
+        node.snapshot = snapshot
+        self.snapshots[id(node)] = node
+        if len(self.snapshots) > self.max_snapshots: self.snapshots.popitem(last=False)[1].snapshot = None
+
+    def load(self, node: _DecisionNode):
+        self.snapshots.move_to_end(id(node))
+        return node.snapshot
@@ -0,0 +1,103 @@
+"""
+reporters.py
+by Fufs
+
+Reporters receive the events of evaluate_player. An event is only emitted (and only formatted) if the reporter overrides its method, so Reporter itself costs nothing.
+
+Events:
+    - start(total)                          - before the first game, total being the number of games to play (games resumed from a log aren't played again).
+    - round(index, trace)                   - every round (data_types.RoundTrace) of a finished game, index being the index of its solution. Subscribing traces every game.
+    - game(index, result, finished, total)  - every finished game (data_types.GameResult), finished being the number of games played so far.
+    - finish(metrics)                       - after the last game (or a KeyboardInterrupt), with the metrics returned by evaluate_player.
+
+This module contains:
+    - Reporter          - silent reporter, base class of the reporters.
+    - ProgressReporter  - progress bar with ETA, redrawn at most every interval seconds.
+    - JSONLinesReporter - writes a JSON object for every game and for the final metrics.
+    - VerboseReporter   - prints every guess and every result, as evaluate_player used to.
+    - subscribed        - Returns whether a reporter subscribes to an event.
+"""
+
+import json
+import sys
+import time
+
+
+class Reporter:
+    """Silent reporter. Subclasses override the methods of the events they subscribe to."""
+    def start(self, total: int) -> None:
+        pass
+
+    def round(self, index: int, trace) -> None:
+        pass
+
+    def game(self, index: int, result, finished: int, total: int) -> None:
+        pass
+
+    def finish(self, metrics: dict) -> None:
+        pass
+
+
+def subscribed(reporter: Reporter, event: str) -> bool:
+    """Returns whether reporter overrides the method of event."""
+    return getattr(type(reporter), event, None) is not getattr(Reporter, event)
+
+
+class ProgressReporter(Reporter):
+    """Progress bar with the number of finished games and the ETA, redrawn in place at most every interval seconds."""
+    def __init__(self, stream=None, interval: float = 0.5, width: int = 30) -> None:
+        self.stream = sys.stderr if stream is None else stream
+        self.interval = interval
+        self.width = width
+
+    def start(self, total: int) -> None:
+        self._start = time.perf_counter()
+        self._drawn = float("-inf")
+
+    def game(self, index: int, result, finished: int, total: int) -> None:
+        now = time.perf_counter()
+        if now - self._drawn < self.interval and finished < total: return
+        self._drawn = now
+
+        elapsed = now - self._start
+        eta = elapsed / finished * (total - finished)
+        filled = self.width * finished // total
+        self.stream.write("\r[" + "#" * filled + "." * (self.width - filled) + "] " + str(finished) + "/" + str(total) + " ETA " + _duration(eta) + " ")
+        self.stream.flush()
+
+    def finish(self, metrics: dict) -> None:
+        self.stream.write("\n")
+        self.stream.flush()
+
+
+class JSONLinesReporter(Reporter):
+    """Writes a JSON object for every finished game ({"index": ..., "solution": ..., ...}) and {"metrics": ...} at the end."""
+    def __init__(self, stream=None) -> None:
+        self.stream = sys.stdout if stream is None else stream
+
+    def game(self, index: int, result, finished: int, total: int) -> None:
+        self.stream.write(json.dumps({"index": index, **result.to_dict()}) + "\n")
+
+    def finish(self, metrics: dict) -> None:
+        self.stream.write(json.dumps({"metrics": metrics}) + "\n")
+        self.stream.flush()
+
+
+class VerboseReporter(Reporter):
+    """Prints every guess, then the result of every game, as evaluate_player used to."""
+    def __init__(self, stream=None) -> None:
+        self.stream = sys.stdout if stream is None else stream
+
+    def round(self, index: int, trace) -> None:
+        print((trace.guess, trace.description, trace.candidates), file=self.stream)
+
+    def game(self, index: int, result, finished: int, total: int) -> None:
+        print("Tested", result["solution"], "(" + str(finished) + "/" + str(total) + ")", file=self.stream)
+        print(result, file=self.stream)
+        print(file=self.stream)
+
+
+def _duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return (str(hours) + ":" if hours > 0 else "") + str(minutes).zfill(2) + ":" + str(seconds).zfill(2)
@@ -0,0 +1,145 @@
+"""
+storage.py
+by Fufs
+
+Versioned binary file formats for an encoded Wordlist and its letter masks and for feedback matrices, loaded through mmap so that processes on one host share the pages.
+
+Wordlist file layout (little-endian, sections aligned to 8 bytes):
+    header  - magic (4s), version (H), letters_per_word (B), reserved (B), number of words (I), words offset (I), masks offset (I), CRC32 of everything after the header (I)
+    words   - letter indices of every word (letters_per_word bytes per word, a = 0), in Wordlist order. Check encoding.py.
+    masks   - 26-bit letter mask of every word (uint32 per word). Check index.py.
+
+Feedback matrix file layout (little-endian):
+    header  - magic (4s), version (H), letters_per_word (B), bytes per code (B), rows (I), columns (I), key (32s), CRC32 of the codes (I), padding to 64 bytes
+    codes   - feedback code of every (row, column) pair, row by row. Check feedback.py.
+
+This module contains:
+    - save_wordlist - Writes a Wordlist and its letter masks to a file.
+    - load_wordlist - Returns the Wordlist stored in a file, with its encoding and letter masks backed by the mapped file.
+    - save_matrix   - Writes a feedback matrix to a file.
+    - load_matrix   - Returns a read-only view of the feedback codes stored in a file, backed by the mapped file.
+"""
+
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+from . import data_types, encoding, index
+
+MAGIC = b"WSWL"
+VERSION = 1
+MATRIX_MAGIC = b"WSFM"
+MATRIX_VERSION = 1
+
+_HEADER = struct.Struct("<4sHBBIIII")
+_MATRIX_HEADER = struct.Struct("<4sHBBII32sI")
+_MATRIX_HEADER_SIZE = 64
+_ALIGNMENT = 8
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def save_wordlist(wordlist: data_types.Wordlist, path: str) -> None:
+    """Writes a Wordlist and its letter masks to a file. The file is replaced atomically."""
+    words = wordlist.encoded.tobytes()
+    masks = array("I", index.get_index(wordlist).masks)
+    if masks.itemsize != 4: raise TypeError("uint32 masks are not available on this platform")
+    if sys.byteorder != "little": masks.byteswap()
+
+    words_offset = _align(_HEADER.size)
+    masks_offset = _align(words_offset + len(words))
+    payload = bytearray(masks_offset - _HEADER.size + len(masks) * 4)
+    payload[words_offset - _HEADER.size:words_offset - _HEADER.size + len(words)] = words
+    payload[masks_offset - _HEADER.size:] = masks.tobytes()
+
+    header = _HEADER.pack(MAGIC, VERSION, wordlist.letters_per_word, 0, len(wordlist), words_offset, masks_offset, zlib.crc32(payload))
+
+    temporary_path = path + ".tmp" + str(os.getpid())
+    with open(temporary_path, "wb") as file:
+        file.write(header)
+        file.write(payload)
+    os.replace(temporary_path, path)
+
+
+def load_wordlist(path: str, verify: bool = True) -> data_types.Wordlist:
+    """Returns the Wordlist stored in a file, with its encoding and letter masks backed by the mapped file.
+    Raises ValueError if the file is not a Wordlist file of a supported version or (if verify) if its checksum doesn't match."""
+    with open(path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(mapped) < _HEADER.size: raise ValueError(path + " is not a Wordlist file")
+    magic, version, letters_per_word, _, size, words_offset, masks_offset, checksum = _HEADER.unpack_from(mapped)
+    if magic != MAGIC: raise ValueError(path + " is not a Wordlist file")
+    if version != VERSION: raise ValueError(path + " has unsupported version " + str(version))
+    if len(mapped) != masks_offset + size * 4 or words_offset + size * letters_per_word > masks_offset: raise ValueError(path + " is truncated or corrupted")
+
+    view = memoryview(mapped)
+    if verify and zlib.crc32(view[_HEADER.size:]) != checksum: raise ValueError(path + " failed the checksum")
+
+    words = view[words_offset:words_offset + size * letters_per_word]
+    text = encoding.decode_word(words)
+    wordlist = data_types.Wordlist.from_sorted([text[i:i + letters_per_word] for i in range(0, len(text), letters_per_word)], letters_per_word)
+    wordlist._encoded = words
+    masks = view[masks_offset:masks_offset + size * 4].cast("I")
+    if sys.byteorder != "little":
+        masks = array("I", masks)
+        masks.byteswap()
+    index.get_index(wordlist, masks=masks)
+    return wordlist
+
+
+def save_matrix(codes, rows: int, columns: int, letters_per_word: int, key: bytes, path: str) -> None:
+    """Writes a feedback matrix (an array of rows*columns codes) to a file. The file is replaced atomically."""
+    if len(codes) != rows * columns: raise ValueError("The matrix doesn't have rows*columns codes")
+    if sys.byteorder != "little" and codes.itemsize > 1:
+        codes = array(codes.typecode, codes)
+        codes.byteswap()
+    data = memoryview(codes).cast("B")
+
+    header = _MATRIX_HEADER.pack(MATRIX_MAGIC, MATRIX_VERSION, letters_per_word, codes.itemsize, rows, columns, key, zlib.crc32(data))
+
+    temporary_path = path + ".tmp" + str(os.getpid())
+    with open(temporary_path, "wb") as file:
+        file.write(header.ljust(_MATRIX_HEADER_SIZE, b"\0"))
+        file.write(data)
+    os.replace(temporary_path, path)
+
+
+def load_matrix(path: str, key: bytes = None, verify: bool = False) -> tuple:
+    """Returns (codes, rows, columns, letters_per_word) of the feedback matrix stored in a file, codes being a read-only memoryview backed by the mapped file.
+    Raises ValueError if the file is not a matrix file of a supported version, if key is given and doesn't match or (if verify) if its checksum doesn't match."""
+    with open(path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(mapped) < _MATRIX_HEADER_SIZE: raise ValueError(path + " is not a feedback matrix file")
+    magic, version, letters_per_word, itemsize, rows, columns, stored_key, checksum = _MATRIX_HEADER.unpack_from(mapped)
+    if magic != MATRIX_MAGIC: raise ValueError(path + " is not a feedback matrix file")
+    if version != MATRIX_VERSION: raise ValueError(path + " has unsupported version " + str(version))
+    if key is not None and stored_key != key: raise ValueError(path + " was built for different wordlists")
+    if len(mapped) != _MATRIX_HEADER_SIZE + rows * columns * itemsize: raise ValueError(path + " is truncated or corrupted")
+
+    data = memoryview(mapped)[_MATRIX_HEADER_SIZE:]
+    if verify and zlib.crc32(data) != checksum: raise ValueError(path + " failed the checksum")
+
+    codes = data.cast({1: "B", 2: "H", 4: "I"}[itemsize])
+    if sys.byteorder != "little" and itemsize > 1:
+        codes = array(codes.format, codes)
+        codes.byteswap()
+    return codes, rows, columns, letters_per_word
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from . import dictionary
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", type=str)
+    args = parser.parse_args()
+
+    save_wordlist(data_types.Wordlist(dictionary.wordlist), args.path)
@@ -9,6 +9,7 @@ This module contains:
     - solution_finder                       - Returns a list of words that qualify as a solution in alphabetical order.
     - score_by_letters                      - Returns a dict with scores for each word to establish the closest match to the solution.
     - score_by_letters_at_positions         - Same as score_by_letters but takes into considaration the position of each letter.
+    - encoded_wordlist                      - Returns the words of a wordlist and their letter indices. Check encoding.py.
     - find_word                             - Returns the index of a word in a sorted wordlist or -1 if not found.
     - letter_checked                        - Returns True if the letter has appeared in previous queries (Think crossed-of letters in Hangman). 
     - reduce                                - Returns a list of words that best reduce the number of potential solutions in order of significance.
@@ -16,8 +17,9 @@ This module contains:
 """
 
 
-from . import data_types
+from . import data_types, encoding, index
 
+import bisect
 import math
 import statistics
 
@@ -31,28 +33,30 @@ def create_scoring_rubric(wordlist: data_types.Wordlist) -> data_types.ScoringRu
 
     if len(wordlist) == 0: return scoring_rubric
 
-    # Count total number of occurances
-    for word in wordlist:
-        for l in range(wordlist.letters_per_word):
-            scoring_rubric[word[l]][0] += 1
-            scoring_rubric[word[l]][l+1] += 1
+    # Count total number of occurances, rubric[letter][i] lives at matrix[code*width + i]
+    matrix = scoring_rubric.matrix
+    width = wordlist.letters_per_word + 1
+    codes = encoded_wordlist(wordlist)[1]
+    for l in range(wordlist.letters_per_word):
+        column = codes[l::wordlist.letters_per_word]
+        for code in set(column):
+            matrix[code*width] += column.count(code)
+            matrix[code*width + l+1] += column.count(code)
 
     # Calculate weights of letters in wordlist and at each position
     total = len(wordlist) * wordlist.letters_per_word
     lowest_occurance = 1.0
-    for key in scoring_rubric:
-        for i in range(1, wordlist.letters_per_word + 1):
-            if scoring_rubric[key][0] != 0:
-                scoring_rubric[key][i] /= scoring_rubric[key][0]
-            else:
-                scoring_rubric[key][i] = 0
-        scoring_rubric[key][0] /= total
-        if scoring_rubric[key][0] != 0:
-            lowest_occurance = min(lowest_occurance, scoring_rubric[key][0])
+    for row in range(0, len(matrix), width):
+        if matrix[row] != 0:
+            for i in range(1, width):
+                matrix[row + i] /= matrix[row]
+        matrix[row] /= total
+        if matrix[row] != 0:
+            lowest_occurance = min(lowest_occurance, matrix[row])
 
     # Scale the ratios of number of occurances for higher diversity between scores.
-    for key in scoring_rubric:
-        scoring_rubric[key][0] /= lowest_occurance
+    for row in range(0, len(matrix), width):
+        matrix[row] /= lowest_occurance
 
     return scoring_rubric
 
@@ -62,102 +66,73 @@ def merge_scoring_rubrics(master_rubric: data_types.ScoringRubric, slave_rubric:
     if master_rubric.letters_per_word != slave_rubric.letters_per_word: raise TypeError("letters_per_word don't match")
 
     merged_rubric = data_types.ScoringRubric(master_rubric.letters_per_word)
+    merged, master, slave = merged_rubric.matrix, master_rubric.matrix, slave_rubric.matrix
+    width = merged_rubric.letters_per_word + 1
     
     total_score = 0
     lowest_occurance = 1.0
-    for key in merged_rubric:
+    for row in range(0, len(merged), width):
         # Calculate weighted average of the general score
-        merged_rubric[key][0] = (master_rubric[key][0]*master_multiplier + slave_rubric[key][0]*slave_multiplier) / (master_multiplier+slave_multiplier)
-        total_score += merged_rubric[key][0]
+        merged[row] = (master[row]*master_multiplier + slave[row]*slave_multiplier) / (master_multiplier+slave_multiplier)
+        total_score += merged[row]
         
         # Calculate weighted averages of weights
         total_weight = 0
-        for i in range(1,merged_rubric.letters_per_word+1):
-            merged_rubric[key][i] = (master_rubric[key][i]*master_multiplier + slave_rubric[key][i]*slave_multiplier) / (master_multiplier+slave_multiplier)
-            total_weight += merged_rubric[key][i]
+        for i in range(row + 1, row + width):
+            merged[i] = (master[i]*master_multiplier + slave[i]*slave_multiplier) / (master_multiplier+slave_multiplier)
+            total_weight += merged[i]
         
         # Normalize the weights
-        for i in range(1,merged_rubric.letters_per_word+1):
-            merged_rubric[key][i] /= total_weight
+        for i in range(row + 1, row + width):
+            merged[i] /= total_weight
             
     # Present score as a ratio of all the scores
-    for key in merged_rubric:
-        merged_rubric[key][0] /= total_score
-        lowest_occurance = min(lowest_occurance, merged_rubric[key][0])
+    for row in range(0, len(merged), width):
+        merged[row] /= total_score
+        lowest_occurance = min(lowest_occurance, merged[row])
 
     # Scale the ratios of scores for higher diversity between scores.
-    for key in merged_rubric:
-        merged_rubric[key][0] /= lowest_occurance
+    for row in range(0, len(merged), width):
+        merged[row] /= lowest_occurance
 
 
     return merged_rubric
 
 
-def create_wordlist_with_unique_letters(wordlist: data_types.Wordlist = data_types.Wordlist(), letters_per_word: int = 5) -> data_types.Wordlist:
+def create_wordlist_with_unique_letters(wordlist: data_types.Wordlist = None, letters_per_word: int = 5) -> data_types.Wordlist:
     """Returns a new wordlist that only contains unique letters."""
 
-    if wordlist == data_types.Wordlist(): wordlist
+    if wordlist is None: wordlist = data_types.Wordlist([], letters_per_word)
 
-    unique_letters_wordset = set()
+    if isinstance(wordlist, data_types.Wordlist):
+        return data_types.Wordlist([wordlist[i] for i in index.get_index(wordlist).unique_letters()], letters_per_word)
 
-    for word in wordlist:
-        unique_letters_in_word = set()
-        for letter in word:
-            unique_letters_in_word.add(letter)
-        if len(word) == len(unique_letters_in_word):
-            unique_letters_wordset.add(word)
-
-    return data_types.Wordlist(unique_letters_wordset, letters_per_word)
+    return data_types.Wordlist([word for word in wordlist if len(word) == len(set(word))], letters_per_word)
 
 
 def solution_finder(wordlist: data_types.Wordlist, positions: data_types.Positions) -> data_types.Wordlist:
-    """Returns a list of words that qualify as a solution in alphabetical order."""
+    """Returns a list of words that qualify as a solution in alphabetical order. A WordlistView is narrowed into a new WordlistView."""
     if wordlist.letters_per_word != positions.letters_per_word: raise TypeError("letters_per_word mismatch")
 
-    solution_wordset = set()
-
-    for word in wordlist:
-        letters = {}
-        for i in range(wordlist.letters_per_word):
-            if word[i] not in letters:
-                letters[word[i]] = set()
-            letters[word[i]].add(i + 1)
-
-        issolution = True
-        broken = False
-        for letter in letters:
-            if not positions[letter][0] <= len(letters[letter]) <= positions[letter][
-                1
-            ] or not letters[letter].issubset(positions[letter][2]):
-                issolution = False
-                break
-            for position in letters[letter]:
-                if (
-                    len(positions[position][1]) > 0
-                    and letter not in positions[position][1]
-                ):
-                    issolution = False
-                    broken = True
-                    break
-
-            if broken:
-                break
-
-        if issolution:
-            solution_wordset.add(word)
-
-    return data_types.Wordlist(solution_wordset)
+    if isinstance(wordlist, data_types.WordlistView):
+        return wordlist.narrow(index.get_index(wordlist.parent).solutions(positions))
+
+    solution_bits = index.get_index(wordlist).solutions(positions)
+    # Collected in index order, so already sorted and unique
+    return data_types.Wordlist.from_sorted([wordlist[i] for i in encoding.bitset_indices(solution_bits)], wordlist.letters_per_word)
 
 
 def score_by_letters(wordlist: data_types.Wordlist, scoring_rubric: data_types.ScoringRubric) -> dict:
     """Returns a dict with scores for each word to establish the closest match to the solution."""
 
+    words, codes = encoded_wordlist(wordlist)
+    if len(words) == 0: return {}
+    letters_per_word = len(codes) // len(words)
+
+    scores = scoring_rubric.column(0).__getitem__
     results = {}
-    for word in wordlist:
-        score = 0
-        for l in range(len(word)):
-            score += scoring_rubric[word[l]][0]
-        results[word] = score
+    for word, word_codes in zip(words, zip(*[iter(codes)] * letters_per_word)):
+        results[word] = sum(map(scores, word_codes))
 
     return results
 
@@ -166,36 +141,45 @@ def score_by_letters(wordlist: data_types.Wordlist, scoring_rubric: data_types.S
 def score_by_letters_at_positions(wordlist: data_types.Wordlist, scoring_rubric: data_types.ScoringRubric) -> dict:
     """Same as score_by_letters but takes into considaration the position of each letter."""
 
+    words, codes = encoded_wordlist(wordlist)
+    if len(words) == 0: return {}
+    letters_per_word = len(codes) // len(words)
+
+    # scores[l][code] is the score of the letter code at position l+1
+    general_scores = scoring_rubric.column(0)
+    scores = [[general * weight for general, weight in zip(general_scores, scoring_rubric.column(l + 1))] for l in range(letters_per_word)]
     results = {}
-    for word in wordlist:
-        score = 0
-        for l in range(len(word)):
-            score += scoring_rubric[word[l]][0] * scoring_rubric[word[l]][l + 1]
-        results[word] = score
+    for word, word_codes in zip(words, zip(*[iter(codes)] * letters_per_word)):
+        results[word] = sum(map(list.__getitem__, scores, word_codes))
 
     return results
 
 
+def encoded_wordlist(wordlist) -> tuple:
+    """Returns the words of wordlist as a list (or the Wordlist itself) and their letter indices as bytes. Check encoding.py."""
+    if isinstance(wordlist, data_types.Wordlist):
+        return wordlist, wordlist.encoded.tobytes()
+    if isinstance(wordlist, data_types.WordlistView):
+        return wordlist, wordlist.encoded
+
+    words = list(wordlist)
+    if len(words) == 0: return words, b""
+    return words, encoding.encode_wordlist(words, len(words[0])).tobytes()
+
+
 def find_word(wordlist: data_types.Wordlist, query: str) -> int:
     """Returns the index of a word in a Wordlist or -1 if not found."""
+    if isinstance(wordlist, data_types.Wordlist):
+        return wordlist.find(query)
 
-    upper_bound = len(wordlist)
-    lower_bound = 0
-
-    while True:
-        i = len(wordlist[lower_bound:upper_bound]) // 2
-        if wordlist[lower_bound + i] == query:
-            return lower_bound + i
-        elif i == 0:
-            return -1
-        if wordlist[lower_bound + i] > query:
-            upper_bound = lower_bound + i
-        else:
-            lower_bound = lower_bound + i
+    i = bisect.bisect_left(wordlist, query)
+    return i if i < len(wordlist) and wordlist[i] == query else -1
 
 
 def letter_checked(letter: str, positions: data_types.Positions):
     """Returns True if the letter has appeared in previous queries (Think crossed-of letters in Hangman)."""
+    if isinstance(positions, data_types.CompactPositions):
+        return bool(positions.checked_letters() >> (ord(letter) - 97) & 1)
     return (
         positions[letter][0] != 0
         or positions[letter][1] != positions.letters_per_word
@@ -207,13 +191,15 @@ def letter_checked(letter: str, positions: data_types.Positions):
 def reduce(wordlist: data_types.Wordlist, scoring_rubric: data_types.ScoringRubric, positions: data_types.Positions, num_of_common_letters: int = 0) -> tuple:
     """Returns a list of words that best reduce the number of potential solutions in order of significance."""
     if wordlist.letters_per_word != scoring_rubric.letters_per_word != positions.letters_per_word: raise TypeError("letters_per_word mismatch")
+    if isinstance(wordlist, data_types.WordlistView): wordlist = wordlist.to_wordlist()
 
     excluded_letters = set()
     total_potential_candidates = set()
     # Mark letters for exclusion
-    for letter in alphabet:
-        if letter_checked(letter, positions):
-            excluded_letters.add(letter)
+    checked_letters = (positions if isinstance(positions, data_types.CompactPositions) else data_types.CompactPositions.from_positions(positions)).checked_letters()
+    for code in range(len(alphabet)):
+        if checked_letters >> code & 1:
+            excluded_letters.add(alphabet[code])
 
     # Create a list of exclusion sets
     if num_of_common_letters == 0 or len(excluded_letters) < num_of_common_letters:
@@ -231,16 +217,10 @@ def reduce(wordlist: data_types.Wordlist, scoring_rubric: data_types.ScoringRubr
                 i += 1
 
     # Create a list of potential best reducing words
+    word_index = index.get_index(wordlist)
     top_potential_candidates = set()
     for exclusion_set in exclusion_sets:
-        reduced_wordset = set(wordlist)
-        for letter in exclusion_set:
-            current_set = set()
-            for word in reduced_wordset:
-                if letter not in word:
-                    current_set.add(word)
-            reduced_wordset = current_set
-        reduced_wordset = create_wordlist_with_unique_letters(reduced_wordset)
+        reduced_wordset = data_types.Wordlist([wordlist[i] for i in word_index.without_letters(index.letters_mask(exclusion_set), unique_letters=True)], wordlist.letters_per_word)
         total_potential_candidates = total_potential_candidates.union(reduced_wordset)
         if len(reduced_wordset) == 0:
             continue
@@ -290,21 +270,15 @@ def reduce(wordlist: data_types.Wordlist, scoring_rubric: data_types.ScoringRubr
 
 
 def guess(wordlist: data_types.Wordlist, scoring_rubric: data_types.ScoringRubric, positions: data_types.Positions) -> tuple:
-    """Returns a list of words that are the closest match to the solution in order of significance."""
+    """Returns a list (WordlistView) of words that are the closest match to the solution in order of significance."""
     if wordlist.letters_per_word != scoring_rubric.letters_per_word != positions.letters_per_word: raise TypeError("letters_per_word mismatch")
 
+    if not isinstance(wordlist, data_types.WordlistView):
+        wordlist = data_types.WordlistView(wordlist)
+
     all_solutions = solution_finder(wordlist, positions)
     all_scoreboard = score_by_letters_at_positions(all_solutions, scoring_rubric)
-
-    for i in range(len(all_solutions)):
-        argMin = i
-        for j in range(i + 1, len(all_solutions)):
-            if all_scoreboard[all_solutions[j]] > all_scoreboard[all_solutions[argMin]]:
-                argMin = j
-
-        tmp = all_solutions[argMin]
-        all_solutions[argMin] = all_solutions[i]
-        all_solutions[i] = tmp
+    all_solutions.sort(key=all_scoreboard.__getitem__, reverse=True)
 
     if len(all_solutions) == 0:
         return [""], 0
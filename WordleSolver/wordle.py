@@ -3,71 +3,214 @@ wordle.py
 by Fufs
 
 This module contains:
-    - play      - play this implementation of the game wordle
+    - play          - play this implementation of the game wordle
+    - play_batch    - play many games of wordle in lockstep, one round of every game at a time
+    - play_multi    - play wordle on several boards at once (Dordle, Quordle, Octordle...)
+    - play_adversarial - play against a host that keeps changing the solution to avoid losing (Absurdle)
 """
 
+import itertools
 import random
-from . import data_types, dictionary, players, utils
+import time
+from . import data_types, defaults, feedback, players
+
+
+def play(wordlist: data_types.Wordlist = None, solution: str | list = None, player: players.Player = None, rounds_per_game=6, extended: bool = False, dev: bool = False, hard_mode: bool = False, trace: bool = False) -> data_types.GameResult:
+    """Plays a game of wordle. By default every word of the game is accepted, the solution is a random solution of the game and the player is a new HumanPlayer.
+    In hard mode every guess has to be consistent with all the hints revealed so far, otherwise the game is lost in rounds_per_game + 1 rounds (even if extended)
+    and the guess is kept in the illegal_guess of the GameResult.
+    The player should be created with hard_mode=True.
+    With trace, every round is recorded in the trace of the GameResult, including the time spent in player.guess and player.check_feedback.
+    The player is wrapped to do so, an untraced game runs exactly the same code as before."""
+    if wordlist is None: wordlist = defaults.wordlist(5)
+    if solution is None: solution = defaults.solution_list()
+    if player is None: player = players.HumanPlayer(hard_mode=hard_mode)
+    if trace: player = _TracedPlayer(player)
+    legal_guesses = feedback.LegalGuesses(wordlist) if hard_mode else None
 
-
-def play(wordlist: data_types.Wordlist = data_types.Wordlist(dictionary.wordlist, 5), solution: str | list = dictionary.solution_list, player: players.Player = players.HumanPlayer(), rounds_per_game=6, extended: bool = False, dev: bool = False):
     if type(solution) == list:
         solution = random.choice(solution)
 
-    if utils.find_word(wordlist, solution) == -1:
+    if wordlist.find(solution) == -1:
         raise ValueError("Solution not in wordlist, win is unachievable")
 
-    solution_letters = {}
-    for i in range(wordlist.letters_per_word):
-        if solution[i] not in solution_letters:
-            solution_letters[solution[i]] = set()
-        solution_letters[solution[i]].add(i + 1)
-
-    for i in range(1, len(wordlist) + 1 if extended else wordlist.letters_per_word + 1):
+    max_rounds = len(wordlist) if extended else wordlist.letters_per_word
+    for i in range(1, max_rounds + 1):
         guessed = player.guess()
         if dev:
             print(guessed)
 
+        if legal_guesses is not None and guessed[0] not in legal_guesses:
+            return data_types.GameResult(solution, rounds_per_game + 1, False, trace=player.trace if trace else None, illegal_guess=guessed[0])
+
         if guessed[0] == solution:
+            if trace: player.trace[-1].code = feedback.all_correct(wordlist.letters_per_word)
+            return data_types.GameResult(solution, i, i <= rounds_per_game, guessed[2], player.trace if trace else None)
+
+        code = feedback.feedback(guessed[0], solution)
+        if legal_guesses is not None: legal_guesses.update(guessed[0], code)
+        player.check_feedback(guessed[0], code)
+
+    return data_types.GameResult(solution, max_rounds + 1, False, trace=player.trace if trace else None)
+
+
+def play_batch(wordlist: data_types.Wordlist, solutions: list, player_factory, rounds_per_game=6, extended: bool = False, batch_size: int = 256, hard_mode: bool = False, trace: bool = False):
+    """
+    Plays a game with a new player (player_factory()) for every solution, same as play, advancing up to batch_size games one round at a time.
+    The feedback of every active game of a round is computed at once (check feedback.feedback_pairs) and finished games are replaced by new ones.
+    Yields (index of the solution, GameResult) as games finish. Hard mode and trace work as in play.
+    """
+    for solution in solutions:
+        if wordlist.find(solution) == -1:
+            raise ValueError("Solution " + solution + " not in wordlist, win is unachievable")
+
+    max_rounds = len(wordlist) if extended else wordlist.letters_per_word
+    pending = iter(enumerate(solutions))
+    # Active games: [index of the solution, solution, player, round, legal guesses in hard mode]
+    active = []
+
+    while True:
+        for index, solution in itertools.islice(pending, batch_size - len(active)):
+            active.append([index, solution, _TracedPlayer(player_factory()) if trace else player_factory(), 0, feedback.LegalGuesses(wordlist) if hard_mode else None])
+        if len(active) == 0: return
+
+        guessing = []
+        for game in active:
+            game[3] += 1
+            guessed = game[2].guess()
+            if game[4] is not None and guessed[0] not in game[4]:
+                yield game[0], data_types.GameResult(game[1], rounds_per_game + 1, False, trace=game[2].trace if trace else None, illegal_guess=guessed[0])
+            elif guessed[0] == game[1]:
+                if trace: game[2].trace[-1].code = feedback.all_correct(wordlist.letters_per_word)
+                yield game[0], data_types.GameResult(game[1], game[3], game[3] <= rounds_per_game, guessed[2], game[2].trace if trace else None)
+            else:
+                guessing.append((game, guessed[0]))
+
+        codes = feedback.feedback_pairs([guess for _, guess in guessing], [game[1] for game, _ in guessing], wordlist.letters_per_word)
+
+        active = []
+        for (game, guess), code in zip(guessing, codes):
+            if game[4] is not None: game[4].update(guess, code)
+            game[2].check_feedback(guess, code)
+            if game[3] < max_rounds:
+                active.append(game)
+            else:
+                yield game[0], data_types.GameResult(game[1], max_rounds + 1, False, trace=game[2].trace if trace else None)
+
+
+def play_multi(wordlist: data_types.Wordlist = None, solutions: list = None, player: players.Player = None, boards: int = 4, rounds_per_game: int = None, extended: bool = False, dev: bool = False):
+    """
+    Plays wordle on several boards at once: every guess is played on every unsolved board, each board having its own solution.
+    By default the solutions are boards different random solutions of the game, rounds_per_game is the number of boards + 5 and the player is a new HumanPlayer.
+    The feedback of all the boards of a round is computed by a single feedback.feedback_batch call and passed to player.check_boards_feedback.
+    A ComputerPlayer has to be written for several boards, check ComputerPlayer.start_boards.
+    """
+    if wordlist is None: wordlist = defaults.wordlist(5)
+    if solutions is None: solutions = random.sample(defaults.solution_list(), boards)
+    if rounds_per_game is None: rounds_per_game = len(solutions) + 5
+    if player is None: player = players.HumanPlayer()
+
+    for solution in solutions:
+        if wordlist.find(solution) == -1:
+            raise ValueError("Solution " + solution + " not in wordlist, win is unachievable")
+
+    max_rounds = len(wordlist) if extended else rounds_per_game
+    # Round in which every board was solved, None while it isn't
+    solved = [None] * len(solutions)
+    history = []
+    player.start_boards(len(solutions))
+
+    for i in range(1, max_rounds + 1):
+        guessed = player.guess()
+        if dev:
+            print(guessed)
+
+        unsolved = [board for board in range(len(solutions)) if solved[board] is None]
+        codes = [None] * len(solutions)
+        for board, code in zip(unsolved, feedback.feedback_batch(guessed[0], [solutions[board] for board in unsolved], wordlist.letters_per_word)):
+            codes[board] = code
+            if code == feedback.all_correct(wordlist.letters_per_word): solved[board] = i
+        history.append(codes)
+
+        if None not in solved:
             return {
-                "solution": solution,
+                "solutions": solutions,
                 "rounds": i,
                 "won": i <= rounds_per_game,
-                "potential_solutions": guessed[2],
+                "board_rounds": solved,
+                "feedback": history,
             }
 
-        round_state = {"excluded": {}, "included": {}, "correct": {}}
-        guessed_letters = {}
+        player.check_boards_feedback(guessed[0], codes)
 
-        for j in range(wordlist.letters_per_word):
-            if guessed[0][j] not in guessed_letters:
-                guessed_letters[guessed[0][j]] = set()
-            guessed_letters[guessed[0][j]].add(j + 1)
+    return {
+        "solutions": solutions,
+        "rounds": max_rounds + 1,
+        "won": False,
+        "board_rounds": solved,
+        "feedback": history,
+    }
 
-        for letter in guessed_letters:
-            if letter in solution_letters:
-                if (len(solution_letters[letter].intersection(guessed_letters[letter])) > 0):
-                    round_state["correct"][letter] = solution_letters[letter].intersection(guessed_letters[letter])
-                    other_green_positions = solution_letters[letter].difference(round_state["correct"][letter])
-                else:
-                    other_green_positions = solution_letters[letter]
 
-                nongreen_guessed_positions = sorted(list(guessed_letters[letter].difference(solution_letters[letter])))
-                round_state["included"][letter] = set(nongreen_guessed_positions[: len(other_green_positions)])
-                if len(nongreen_guessed_positions[len(other_green_positions):]) > 0:
-                    round_state["excluded"][letter] = set(nongreen_guessed_positions[len(other_green_positions):])
+def play_adversarial(wordlist: data_types.Wordlist = None, solutions: list = None, player: players.Player = None, rounds_per_game=6, extended: bool = False, dev: bool = False, trace: bool = False) -> data_types.GameResult:
+    """
+    Plays wordle against an adversarial host (Absurdle). There is no fixed solution: every round the host partitions the remaining candidates (solutions by default) by the feedback of the guess
+    and answers with the feedback of the largest group, which become the remaining candidates. The game is won once the guess is the only candidate left.
+    The number of rounds is the worst case of the player over all the candidates, found without playing a game for every one of them.
+    A lost game has no solution and its potential_solutions is the number of candidates left. trace works as in play.
+    """
+    if wordlist is None: wordlist = defaults.wordlist(5)
+    if solutions is None: solutions = defaults.solution_list()
+    if player is None: player = players.HumanPlayer()
+    if trace: player = _TracedPlayer(player)
+
+    candidates = []
+    for solution in solutions:
+        i = wordlist.find(solution)
+        if i == -1: raise ValueError("Solution " + solution + " not in wordlist, win is unachievable")
+        candidates.append(i)
+    candidates = data_types.WordlistView(wordlist, sorted(set(candidates)))
+
+    win = feedback.all_correct(wordlist.letters_per_word)
+    max_rounds = len(wordlist) if extended else wordlist.letters_per_word
+    for i in range(1, max_rounds + 1):
+        guessed = player.guess()
+        if dev:
+            print(guessed)
 
-            else:
-                round_state["excluded"][letter] = guessed_letters[letter]
+        codes, sizes = feedback.partition(guessed[0], candidates, wordlist.letters_per_word)
+        # Largest group, then any group that isn't a win, then the group with the fewest hinted (not excluded) letters, then the lowest feedback code
+        code = max(range(len(sizes)), key=lambda code: (sizes[code], code != win, feedback.states(code, wordlist.letters_per_word).count(feedback.EXCLUDED), -code))
+        if code == win:
+            if trace: player.trace[-1].code = win
+            return data_types.GameResult(guessed[0], i, i <= rounds_per_game, guessed[2], player.trace if trace else None)
 
-        # print(round_state)
-        player.check_letters(round_state)
+        candidates = data_types.WordlistView(wordlist, [candidates.indices[j] for j in range(len(codes)) if codes[j] == code])
+        player.check_feedback(guessed[0], code)
 
-    return {
-        "solution": solution,
-        "rounds": len(wordlist) + 1 if extended else wordlist.letters_per_word + 1,
-        "won": False,
-    }
+    return data_types.GameResult(None, max_rounds + 1, False, len(candidates), player.trace if trace else None)
+
+
+class _TracedPlayer:
+    """Wraps a player and records a RoundTrace of every round it plays. Everything else is passed through to the player."""
+    def __init__(self, player: players.Player) -> None:
+        self.player = player
+        self.trace = []
+
+    def guess(self):
+        start = time.perf_counter()
+        guessed = self.player.guess()
+        self.trace.append(data_types.RoundTrace(guessed[0], guessed[1], None, guessed[2], time.perf_counter() - start))
+        return guessed
+
+    def check_feedback(self, guess: str, code: int) -> None:
+        start = time.perf_counter()
+        self.player.check_feedback(guess, code)
+        self.trace[-1].code = code
+        self.trace[-1].feedback_seconds = time.perf_counter() - start
+
+    def __getattr__(self, name: str):
+        return getattr(self.player, name)
 
 
 if __name__ == "__main__":